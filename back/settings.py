@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 import os
 
@@ -40,7 +41,10 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework.authtoken',
+    'rest_framework_simplejwt.token_blacklist',
     'core',
+    'location',
+    'user',
 ]
 
 MIDDLEWARE = [
@@ -89,6 +93,30 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# cache de lectura de location, las llaves llevan la version de core.Revision de cada
+# tabla asi que una escritura en cualquier proceso las invalida (location.signals)
+LOCATION_CACHE_ALIAS = 'default'
+LOCATION_CACHE_TIMEOUT = 60 * 60
+# arbol de paises con al menos esta cantidad de ciudades se guarda comprimido
+LOCATION_TREE_SNAPSHOT_MIN_CITIES = 1000
+# segundos sin escrituras antes de regenerar MEDIA_ROOT/location/locations.json(.gz|.br), None lo desactiva
+LOCATION_SNAPSHOT_DEBOUNCE = 5
+# una peticion que encuentra el snapshot viejo lo regenera con un advisory lock de
+# postgres, en otras bases con LOCATION_CACHE_ALIAS y esta cantidad de segundos
+LOCATION_SNAPSHOT_LOCK_TIMEOUT = 60
+# filas por pagina de location/changes/, con o sin since
+LOCATION_SYNC_PAGE_SIZE = 1000
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -107,6 +135,27 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# el primero define el hash de las contraseñas nuevas, PASSWORD_HASH_ITERATIONS
+# se ajusta con manage.py tune_hasher
+PASSWORD_HASHERS = [
+    'user.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = 260000
+
+# el hash del login corre en un pool de LOGIN_HASH_WORKERS hilos con LOGIN_HASH_QUEUE
+# en espera, lleno responde 503 con Retry-After (user.hashing)
+AUTHENTICATION_BACKENDS = ['user.backends.EmailBackend']
+LOGIN_HASH_WORKERS = 4
+LOGIN_HASH_QUEUE = 16
+LOGIN_HASH_RETRY_AFTER = 1
+
+# procesos del pool compartido que calcula los hashes de users/users/bulk/,
+# manage.py bulk_create_users usa uno por nucleo (user.provisioning)
+PROVISIONING_API_WORKERS = 2
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -139,4 +188,48 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# paginacion por cursor (core.pagination.KeysetPagination)
+KEYSET_PAGE_SIZE = 100
+KEYSET_MAX_PAGE_SIZE = 1000
+# el listado publico de usuarios tiene un tope menor
+USER_LIST_PAGE_SIZE = 50
+USER_LIST_MAX_PAGE_SIZE = 100
+
+# cache token -> usuario de user.authentication.CachedTokenAuthentication, con
+# TOKEN_AUTH_CACHE_ALIAS tambien se guarda en ese cache compartido entre procesos
+# y la invalidacion llega a todos en la siguiente peticion; sin el, cada proceso
+# guarda el token solo TOKEN_AUTH_LOCAL_TTL segundos porque los otros no se enteran
+# de un token borrado, un usuario desactivado o una contraseña cambiada
+TOKEN_AUTH_CACHE_SIZE = 10000
+TOKEN_AUTH_CACHE_TTL = 300
+TOKEN_AUTH_LOCAL_TTL = 5
+TOKEN_AUTH_CACHE_ALIAS = None
+
+# jwt (user/token/jwt/), las vistas de location y register aceptan token o jwt,
+# los refresh rotados o revocados quedan en la lista negra de token_blacklist
+JWT_AUTH_ENABLED = True
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': True,
+    'AUTH_HEADER_TYPES': ('Bearer',),
+}
+
+# listados desde QuerySet.values() sin un serializer por fila (core.fastlist.FastListMixin)
+FAST_LIST_SERIALIZATION = True
+
+# json con orjson (core.renderers / core.parsers), sin orjson usan el json de la libreria estandar
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
 APPEND_SLASH=False
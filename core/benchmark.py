@@ -0,0 +1,11 @@
+import time
+
+
+def measure(function, repeat):
+    """ fastest of repeat runs in seconds, the others carry noise from the machine """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
@@ -0,0 +1,232 @@
+from functools import reduce
+from operator import or_
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    primary key field that reads the related rows resolved for the whole
+    bulk payload with one IN query, instead of one query per item
+    """
+
+    def to_internal_value(self, data):
+        resolved = self.context.get('bulk_related', {}).get(self.field_name)
+        if resolved is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return resolved[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+def get_unique_keys(model):
+    """ field names tuples that must be unique, unique fields and unconditional unique constraints """
+    keys = [(field.name,) for field in model._meta.concrete_fields if field.unique and not field.primary_key]
+    keys += [tuple(fields) for fields in model._meta.unique_together]
+    keys += [tuple(constraint.fields) for constraint in model._meta.total_unique_constraints]
+    return keys
+
+
+def strip_unique_validators(serializer):
+    """ the bulk payload is checked against the table with one query per unique key, not one per item """
+    serializer.validators = [
+        validator for validator in serializer.validators if not isinstance(validator, UniqueTogetherValidator)
+    ]
+    for field in serializer.fields.values():
+        field.validators = [validator for validator in field.validators if not isinstance(validator, UniqueValidator)]
+    return serializer
+
+
+class BulkModelMixin:
+    """
+    POST and PATCH of a list of items on <resource>/bulk/, every item is
+    validated in one pass and written with one bulk query in a transaction
+    """
+
+    def get_bulk_max_items(self):
+        return getattr(settings, 'BULK_MAX_ITEMS', 1000)
+
+    def get_bulk_save_kwargs(self):
+        """ extra attributes for the created rows, like serializer.save(**kwargs) """
+        return {}
+
+    def perform_bulk_write(self, instances):
+        """ hook called after the rows were written """
+
+    def get_bulk_related(self, serializer, items):
+        """ {field name: {pk: instance}} with one query per related field """
+        related = {}
+        for name, field in serializer.fields.items():
+            if not isinstance(field, BulkPrimaryKeyRelatedField) or field.read_only:
+                continue
+            pks = set()
+            for item in items:
+                try:
+                    pks.add(int(item[name]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+            related[name] = field.get_queryset().in_bulk(pks)
+        return related
+
+    @action(detail=False, methods=['post', 'patch'])
+    def bulk(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of items.']})
+        if len(items) > self.get_bulk_max_items():
+            raise ValidationError({'non_field_errors': ['Ensure this list has no more than %d items.' % self.get_bulk_max_items()]})
+
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        dict_items = [item for item in items if isinstance(item, dict)]
+        context['bulk_related'] = self.get_bulk_related(serializer_class(context=context), dict_items)
+
+        if request.method == 'POST':
+            return self.bulk_create(serializer_class, context, items)
+        return self.bulk_update(serializer_class, context, items)
+
+    def bulk_create(self, serializer_class, context, items):
+        item_serializers = [strip_unique_validators(serializer_class(data=item, context=context)) for item in items]
+        errors = self.get_bulk_errors(enumerate(item_serializers))
+        model = serializer_class.Meta.model
+        extra = self.get_bulk_save_kwargs()
+        if not errors:
+            errors = self.get_bulk_unique_errors(model, [
+                (index, {**extra, **serializer.validated_data}, None)
+                for index, serializer in enumerate(item_serializers)
+            ])
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        instances = [model(**serializer.validated_data, **extra) for serializer in item_serializers]
+        self.write_bulk(model.objects.bulk_create, instances)
+        self.perform_bulk_write(instances)
+        data = [serializer_class(instance, context=context).data for instance in instances]
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, serializer_class, context, items):
+        ids = set()
+        for item in items:
+            try:
+                ids.add(int(item['id']))
+            except (KeyError, TypeError, ValueError):
+                pass
+        instances = self.get_queryset().in_bulk(ids)
+
+        item_serializers = []
+        errors = []
+        for index, item in enumerate(items):
+            try:
+                instance = instances[int(item['id'])]
+            except (KeyError, TypeError, ValueError):
+                errors.append({'index': index, 'errors': {'id': ['Not found.']}})
+                continue
+            serializer = serializer_class(instance, data=item, partial=True, context=context)
+            item_serializers.append((index, strip_unique_validators(serializer)))
+        errors += self.get_bulk_errors(item_serializers)
+        model = serializer_class.Meta.model
+        if not errors:
+            errors = self.get_bulk_unique_errors(model, [
+                (index, serializer.validated_data, serializer.instance) for index, serializer in item_serializers
+            ])
+        if errors:
+            errors.sort(key=lambda error: error['index'])
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        fields = set()
+        updated = []
+        for index, serializer in item_serializers:
+            instance = serializer.instance
+            for attr, value in serializer.validated_data.items():
+                setattr(instance, attr, value)
+            changed = instance.get_changed_fields() if hasattr(instance, 'get_changed_fields') else None
+            if changed is None:
+                changed = serializer.validated_data
+            # las filas sin cambios no se escriben
+            if changed:
+                fields.update(changed)
+                updated.append(instance)
+        if fields:
+            # bulk_update no llama pre_save, se calculan aqui los campos que dependen de el
+            for field in model._meta.concrete_fields:
+                if getattr(field, 'auto_now', False) or getattr(field, 'source', None) in fields:
+                    fields.add(field.name)
+                    for instance in updated:
+                        field.pre_save(instance, False)
+            self.write_bulk(model.objects.bulk_update, updated, sorted(fields))
+            for instance in updated:
+                if hasattr(instance, 'set_loaded_values'):
+                    instance.set_loaded_values(fields)
+            self.perform_bulk_write(updated)
+        return Response([serializer.data for index, serializer in item_serializers])
+
+    def write_bulk(self, write, *args):
+        """ a unique key taken by a concurrent write is a 400 like the ones found in validation """
+        try:
+            with transaction.atomic():
+                write(*args)
+        except IntegrityError:
+            raise ValidationError({'non_field_errors': ['The items conflict with rows written concurrently, retry the request.']})
+
+    def get_bulk_unique_errors(self, model, items):
+        """
+        per item errors of the unique keys repeated inside the payload or
+        already used by other rows, items are (index, values, instance or None)
+        """
+        errors = {}
+        for key in get_unique_keys(model):
+            fields = [model._meta.get_field(name) for name in key]
+            values = {}
+            for index, data, instance in items:
+                value = []
+                for field in fields:
+                    if field.name in data:
+                        item = data[field.name]
+                    elif field.attname in data:
+                        item = data[field.attname]
+                    elif instance is not None:
+                        item = getattr(instance, field.attname)
+                    else:
+                        break
+                    value.append(item.pk if field.is_relation and hasattr(item, 'pk') else item)
+                else:
+                    if tuple(value) in values:
+                        errors.setdefault(index, self.get_unique_message(key, 'within the list'))
+                    else:
+                        values[tuple(value)] = (index, instance)
+            if not values:
+                continue
+
+            attnames = [field.attname for field in fields]
+            taken = model._default_manager.filter(
+                reduce(or_, [Q(**dict(zip(attnames, value))) for value in values])
+            ).values_list('pk', *attnames)
+            for row in taken:
+                index, instance = values[tuple(row[1:])]
+                if instance is None or instance.pk != row[0]:
+                    errors.setdefault(index, self.get_unique_message(key, 'already in use'))
+        return [{'index': index, 'errors': errors[index]} for index in sorted(errors)]
+
+    def get_unique_message(self, key, reason):
+        if len(key) == 1:
+            return {key[0]: ['This value is %s.' % reason]}
+        return {'non_field_errors': ['The fields %s must make a unique set, this one is %s.' % (', '.join(key), reason)]}
+
+    def get_bulk_errors(self, item_serializers):
+        """ per item errors of (index, serializer) pairs """
+        errors = []
+        for index, serializer in item_serializers:
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+        return errors
@@ -0,0 +1,29 @@
+import unicodedata
+from django.db import models
+
+
+def normalize_search(value):
+    """ lowercase text without accents and repeated spaces, 'Bogotá  D.C.' -> 'bogota d.c.' """
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.casefold().split())
+
+
+class SearchNameField(models.CharField):
+    """ copy of another field normalized with normalize_search, filled on every save """
+
+    def __init__(self, *args, source='name', **kwargs):
+        self.source = source
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('db_index', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize_search(getattr(model_instance, self.source))[:self.max_length]
+        setattr(model_instance, self.attname, value)
+        return value
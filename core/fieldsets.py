@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def split_paths(paths):
+    """ ['id', 'state.name', 'state.country'] -> {'id': [], 'state': ['name', 'country']} """
+    tree = OrderedDict()
+    for path in paths:
+        name, _, rest = path.partition('.')
+        children = tree.setdefault(name, [])
+        if rest:
+            children.append(rest)
+    return tree
+
+
+def get_query_plan(serializer, prefix=''):
+    """
+    (select_related paths, only() columns) needed to render a model serializer,
+    columns is None when a field does not map to a concrete model field
+    """
+    model = serializer.Meta.model
+    related, columns = [], []
+    for field in serializer.fields.values():
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            columns = None
+            continue
+        if not model_field.concrete or model_field.many_to_many:
+            columns = None
+            continue
+        path = prefix + field.source
+        if columns is not None:
+            columns.append(path)
+        if isinstance(field, serializers.BaseSerializer):
+            nested_related, nested_columns = get_query_plan(field, path + '__')
+            related += [path] + nested_related
+            if columns is not None and nested_columns is not None:
+                columns += nested_columns
+            else:
+                columns = None
+    return related, columns
+
+
+class DynamicFieldsMixin:
+    """
+    model serializer mixin, fields=[...] keeps only those fields and
+    expand=[...] nests only the relations listed in expandable_fields, the
+    rest are rendered as primary keys. Dotted paths reach the nested
+    serializers, also the default ones when expand is not given, without
+    arguments the output is the usual one
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        self.selected_fields = kwargs.pop('fields', None)
+        self.expanded_fields = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = None
+        if self.selected_fields is not None:
+            selected = split_paths(self.selected_fields)
+            fields = OrderedDict((name, field) for name, field in fields.items() if name in selected)
+        if self.expanded_fields is None:
+            # default nested serializers stay, trimmed by the dotted fields
+            for name, field in fields.items():
+                if selected and selected[name] and isinstance(field, DynamicFieldsMixin):
+                    fields[name] = type(field)(*field._args, **dict(field._kwargs, fields=selected[name]))
+            return fields
+
+        expand = split_paths(self.expanded_fields)
+        for name, field in fields.items():
+            if name in expand and name in self.expandable_fields:
+                fields[name] = self.expandable_fields[name](
+                    fields=(selected and selected[name]) or None,
+                    expand=expand[name],
+                    read_only=True,
+                )
+            elif isinstance(field, serializers.BaseSerializer):
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+        return fields
+
+
+class FieldsetMixin:
+    """
+    viewset mixin for ?fields=id,name and ?expand=state,state.country on list
+    and retrieve, the query selects only the columns and joins rendered
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    fieldset_actions = ('list', 'retrieve')
+    fieldset_columns = ()
+
+    def get_fieldset(self):
+        """ serializer kwargs from the query string """
+        if self.action not in self.fieldset_actions:
+            return {}
+        fieldset = {}
+        for name, param in (('fields', self.fields_query_param), ('expand', self.expand_query_param)):
+            if param in self.request.query_params:
+                value = self.request.query_params[param]
+                fieldset[name] = [path.strip() for path in value.split(',') if path.strip()]
+        return fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        for name, value in self.get_fieldset().items():
+            kwargs.setdefault(name, value)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.fieldset_actions:
+            return queryset
+
+        related, columns = get_query_plan(self.get_serializer())
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        if columns is not None:
+            columns += self.fieldset_columns
+            if self.action == 'list' and hasattr(self.paginator, 'get_ordering'):
+                columns += self.paginator.get_ordering(self.request)[1]
+            queryset = queryset.only(*columns)
+        return queryset
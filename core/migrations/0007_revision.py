@@ -0,0 +1,30 @@
+# Generated by Django 3.2.12 on 2026-10-18 14:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def create_location_revisions(apps, schema_editor):
+    Revision = apps.get_model('core', 'Revision')
+    for name in ('country', 'state', 'city'):
+        Revision.objects.get_or_create(name=name, defaults={'version': 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_auto_20220731_1817'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Revision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_location_revisions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.12 on 2026-10-18 14:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Fecha Actualizacion'),
+        ),
+        migrations.AddField(
+            model_name='country',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Fecha Actualizacion'),
+        ),
+        migrations.AddField(
+            model_name='state',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Fecha Actualizacion'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['model', 'deleted'], name='core_tombst_model_28d847_idx'),
+        ),
+    ]
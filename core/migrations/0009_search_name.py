@@ -0,0 +1,38 @@
+# Generated by Django 3.2.12 on 2026-10-18 14:09
+
+import core.fields
+from django.db import migrations
+
+
+def fill_search_name(apps, schema_editor):
+    for model_name in ('State', 'City'):
+        model = apps.get_model('core', model_name)
+        batch = []
+        for obj in model.objects.only('id', 'name').iterator(chunk_size=2000):
+            obj.search_name = core.fields.normalize_search(obj.name)[:255]
+            batch.append(obj)
+            if len(batch) == 2000:
+                model.objects.bulk_update(batch, ['search_name'])
+                batch = []
+        model.objects.bulk_update(batch, ['search_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_location_change_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='search_name',
+            field=core.fields.SearchNameField(db_index=True, default='', editable=False, max_length=255, source='name'),
+        ),
+        migrations.AddField(
+            model_name='state',
+            name='search_name',
+            field=core.fields.SearchNameField(db_index=True, default='', editable=False, max_length=255, source='name'),
+        ),
+        migrations.RunPython(fill_search_name, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.12 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_search_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='country',
+            name='code',
+            field=models.IntegerField(unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name='city',
+            constraint=models.UniqueConstraint(fields=('state', 'code'), name='city_state_code_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='state',
+            constraint=models.UniqueConstraint(fields=('country', 'code'), name='state_country_code_unique'),
+        ),
+    ]
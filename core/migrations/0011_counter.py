@@ -0,0 +1,28 @@
+# Generated by Django 3.2.12 on 2026-10-18 14:30
+
+from django.db import migrations, models
+
+
+def create_user_counter(apps, schema_editor):
+    Counter = apps.get_model('core', 'Counter')
+    User = apps.get_model('core', 'User')
+    Counter.objects.update_or_create(name='user', defaults={'value': User.objects.count()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_location_code_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_user_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.2.12 on 2026-10-18 15:05
+
+import sys
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+BATCH_SIZE = 500
+
+
+def find_email_collisions(queryset, batch_size=BATCH_SIZE):
+    """
+    lotes de (correo en minusculas, [correos]) de usuarios que solo difieren
+    en mayusculas, los grupos salen de un GROUP BY y los correos se leen por lotes
+    """
+    keys = list(
+        queryset.annotate(email_lower=Lower('email')).values('email_lower')
+        .annotate(total=Count('id')).filter(total__gt=1)
+        .order_by('email_lower').values_list('email_lower', flat=True)
+    )
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        groups = {key: [] for key in batch}
+        rows = (
+            queryset.annotate(email_lower=Lower('email')).filter(email_lower__in=batch)
+            .order_by('id').values_list('email_lower', 'email')
+        )
+        for key, email in rows:
+            groups[key].append(email)
+        yield list(groups.items())
+
+
+def report_email_collisions(apps, schema_editor):
+    """ el indice unico no se puede crear con duplicados, se listan para corregirlos antes """
+    User = apps.get_model('core', 'User')
+    total = 0
+    for batch in find_email_collisions(User.objects.using(schema_editor.connection.alias)):
+        for key, emails in batch:
+            sys.stdout.write('\n  email collision %s: %s' % (key, ', '.join(emails)))
+        total += len(batch)
+    if total:
+        raise RuntimeError(
+            '%d emails are used by several users with different case, merge or rename them '
+            'before creating user_email_lower_unique' % total
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_user_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(report_email_collisions, migrations.RunPython.noop),
+        # django 3.2 no tiene UniqueConstraint sobre expresiones
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX user_email_lower_unique ON core_user (LOWER(email))',
+            'DROP INDEX user_email_lower_unique',
+        ),
+    ]
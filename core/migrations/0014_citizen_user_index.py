@@ -0,0 +1,25 @@
+# Generated by Django 3.2.12 on 2026-10-18 15:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_user_email_lower'),
+    ]
+
+    operations = [
+        # el indice compuesto se crea antes de quitar el de la llave
+        migrations.AddIndex(
+            model_name='citizen',
+            index=models.Index(fields=['user', 'id'], name='citizen_user_idx'),
+        ),
+        migrations.AlterField(
+            model_name='citizen',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.12 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_citizen_user_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='city',
+            index=models.Index(fields=['name', 'id'], name='city_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(fields=['name', 'id'], name='country_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='state',
+            index=models.Index(fields=['name', 'id'], name='state_name_idx'),
+        ),
+    ]
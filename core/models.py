@@ -1,10 +1,74 @@
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, PermissionsMixin, Group
 from django.conf import settings
+from django.utils import timezone
+from core.fields import SearchNameField
 import os
 import uuid
 
 
+class DirtyFieldsMixin:
+    """
+    guarda los valores leidos de la base (from_db) para saber que campos
+    cambiaron, save_changed escribe solo esos campos en un UPDATE y si no
+    cambio nada no escribe
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def set_loaded_values(self, fields=None):
+        ''' toma los valores actuales como los guardados en la base '''
+        loaded = dict(getattr(self, '_loaded_values', {}))
+        for field in self._meta.concrete_fields:
+            if (fields is None or field.name in fields or field.attname in fields) and field.attname in self.__dict__:
+                loaded[field.attname] = self.__dict__[field.attname]
+        # se reemplaza el dict, las copias del cache de autenticacion comparten el anterior
+        self._loaded_values = loaded
+
+    def get_changed_fields(self):
+        ''' nombres de los campos modificados, None si la instancia no viene de la base '''
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None or self._state.adding:
+            return None
+        changed = []
+        for field in self._meta.concrete_fields:
+            if field.attname not in self.__dict__:
+                continue
+            # un campo diferido que se asigno despues no tiene valor original
+            if field.attname not in loaded or loaded[field.attname] != self.__dict__[field.attname]:
+                changed.append(field.name)
+        return changed
+
+    def save_changed(self, **kwargs):
+        ''' save(update_fields=campos modificados), devuelve False si no habia cambios '''
+        changed = self.get_changed_fields()
+        if changed is None:
+            self.save(**kwargs)
+            return True
+        if not changed:
+            return False
+        # auto_now y SearchNameField se calculan en pre_save, solo se escriben si se guarda su origen
+        for field in self._meta.concrete_fields:
+            if field.name not in changed and (getattr(field, 'auto_now', False) or getattr(field, 'source', None) in changed):
+                changed.append(field.name)
+        self.save(update_fields=changed, **kwargs)
+        return True
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.set_loaded_values(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self.set_loaded_values(fields)
+
+
 class UserManager(BaseUserManager):
     """ clase helper manejadora del modelo user """
 
@@ -15,9 +79,19 @@ class UserManager(BaseUserManager):
         email = self.normalize_email(email)
         user = self.model(email=email, **params)
         user.set_password(password)
-        user.save(using=self._db)
+        # el contador de usuarios se actualiza en la misma transaccion (user.signals)
+        with transaction.atomic(using=self._db):
+            user.save(using=self._db)
         return user
 
+    def filter_email(self, email):
+        ''' usuarios con el correo sin distinguir mayusculas, consulta el indice unico sobre LOWER(email) '''
+        return self.alias(email_lower=Lower('email')).filter(email_lower=Lower(Value(email)))
+
+    def get_by_natural_key(self, email):
+        ''' login sin distinguir mayusculas, una sola busqueda en el indice '''
+        return self.filter_email(email).get()
+
     def create_superuser(self, email, password, **kwargs):
         ''' crear usuario superusuario '''
         if not password:
@@ -29,7 +103,7 @@ class UserManager(BaseUserManager):
         return user
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(DirtyFieldsMixin, AbstractBaseUser, PermissionsMixin):
     """ Modelo usuario """
     email = models.EmailField(max_length=255, verbose_name='Correo Electronico', unique=True)
     name = models.CharField(max_length=100, verbose_name='Nombre')
@@ -43,42 +117,81 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name']
 
+    class Meta:
+        # listado por cursor (created, id) con filtros de user.views.ListUser
+        indexes = [
+            models.Index(fields=['created', 'id'], name='user_created_idx'),
+            models.Index(fields=['is_active', 'created', 'id'], name='user_active_created_idx'),
+            models.Index(fields=['is_staff', 'created', 'id'], name='user_staff_created_idx'),
+        ]
+        # el filtro email__startswith usa el indice _like que postgres crea para el campo unico
+        # indice unico sobre LOWER(email) creado en la migracion 0013_user_email_lower
+
     def __str__(self):
         return self.email
 
 
-class Country(models.Model):
+class Country(DirtyFieldsMixin, models.Model):
     """ model country """
     name = models.CharField(max_length=255, verbose_name='Nombre')
-    code = models.IntegerField()
+    code = models.IntegerField(unique=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Fecha Actualizacion')
+
+    class Meta:
+        # listado por cursor con ?ordering=name (core.pagination.KeysetPagination)
+        indexes = [
+            models.Index(fields=['name', 'id'], name='country_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class State(models.Model):
+class State(DirtyFieldsMixin, models.Model):
     """ model country """
     name = models.CharField(max_length=255, verbose_name='Nombre')
+    search_name = SearchNameField(source='name', max_length=255, default='')
     code = models.IntegerField()
+    updated = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Fecha Actualizacion')
 
     country = models.ForeignKey(Country, on_delete=models.CASCADE, related_name='states')
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['country', 'code'], name='state_country_code_unique'),
+        ]
+        # listado por cursor con ?ordering=name (core.pagination.KeysetPagination)
+        indexes = [
+            models.Index(fields=['name', 'id'], name='state_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
 
-class City(models.Model):
+class City(DirtyFieldsMixin, models.Model):
     """ model country """
     name = models.CharField(max_length=255, verbose_name='Nombre')
+    search_name = SearchNameField(source='name', max_length=255, default='')
     code = models.IntegerField()
+    updated = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Fecha Actualizacion')
 
     state = models.ForeignKey(State, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['state', 'code'], name='city_state_code_unique'),
+        ]
+        # listado por cursor con ?ordering=name (core.pagination.KeysetPagination)
+        indexes = [
+            models.Index(fields=['name', 'id'], name='city_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
 
-class Citizen(models.Model):
+class Citizen(DirtyFieldsMixin, models.Model):
     """ model citizen """
     name = models.CharField(max_length=20)
     last_name = models.CharField(max_length=20)
@@ -86,7 +199,96 @@ class Citizen(models.Model):
     phone = models.BigIntegerField()
     no_identification = models.BigIntegerField()
     city = models.ForeignKey(City, on_delete=models.CASCADE)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # citizen_user_idx empieza por user_id, el indice propio de la llave sobra
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        # register.views filtra por usuario en todas las acciones, el detalle es (user_id, id)
+        indexes = [
+            models.Index(fields=['user', 'id'], name='citizen_user_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class RevisionManager(models.Manager):
+    """ clase helper manejadora del modelo revision """
+
+    def bump(self, name):
+        ''' incrementa la version de una tabla '''
+        updated = self.filter(name=name).update(version=models.F('version') + 1, updated=timezone.now())
+        if not updated:
+            self.get_or_create(name=name, defaults={'version': 1})
+
+    def get_versions(self, names):
+        ''' versiones de varias tablas en una sola consulta por indice '''
+        return {
+            name: (version, updated)
+            for name, version, updated in self.filter(name__in=names).values_list('name', 'version', 'updated')
+        }
+
+
+class Revision(models.Model):
+    """ model revision, version of a table bumped on every write """
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(default=timezone.now)
+
+    objects = RevisionManager()
+
+    def __str__(self):
+        return '%s:%s' % (self.name, self.version)
+
+
+class CounterManager(models.Manager):
+    """ clase helper manejadora del modelo counter """
+
+    def add(self, name, delta):
+        ''' suma al contador, sin fila se recalcula en la siguiente lectura '''
+        self.filter(name=name).update(value=models.F('value') + delta)
+
+    def get_value(self, name, queryset):
+        ''' valor del contador, se crea con queryset.count() si no existe '''
+        value = self.filter(name=name).values_list('value', flat=True).first()
+        if value is None:
+            value = self.get_or_create(name=name, defaults={'value': queryset.count()})[0].value
+        return value
+
+    def estimate(self, model):
+        ''' filas estimadas por el planificador de postgres, None en otras bases o sin analyze '''
+        connection = connections[self.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+        if row is None or row[0] < 0:
+            return None
+        return int(row[0])
+
+
+class Counter(models.Model):
+    """ model counter, row count of a table maintained by signals """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    objects = CounterManager()
+
+    def __str__(self):
+        return '%s:%s' % (self.name, self.value)
+
+
+class Tombstone(models.Model):
+    """ model tombstone, rows deleted from the location tables """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'deleted']),
+        ]
+
+    def __str__(self):
+        return '%s:%s' % (self.model, self.object_id)
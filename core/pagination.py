@@ -0,0 +1,146 @@
+import datetime
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    keyset (cursor) pagination, pages are filtered with a WHERE over the
+    ordering columns instead of an OFFSET, so every page costs the same
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    orderings = {
+        'id': ('id',),
+        'name': ('name', 'id'),
+    }
+    default_ordering = 'id'
+    page_size_setting = 'KEYSET_PAGE_SIZE'
+    max_page_size_setting = 'KEYSET_MAX_PAGE_SIZE'
+    cursor_salt = 'core.pagination.keyset'
+    invalid_cursor_message = _('Invalid cursor')
+
+    def get_page_size(self, request):
+        """ page size requested, capped by the max_page_size_setting setting """
+        page_size = getattr(settings, self.page_size_setting, 100)
+        max_page_size = getattr(settings, self.max_page_size_setting, 1000)
+        value = request.query_params.get(self.page_size_query_param)
+        if value:
+            try:
+                page_size = int(value)
+            except ValueError:
+                pass
+        return max(1, min(page_size, max_page_size))
+
+    def get_ordering(self, request):
+        name = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if name not in self.orderings:
+            name = self.default_ordering
+        return name, self.orderings[name]
+
+    def decode_cursor(self, request):
+        """ returns (position, reverse) or None on the first page """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = signing.loads(encoded, salt=self.cursor_salt)
+            position, reverse, ordering = data['p'], bool(data['r']), data['o']
+        except (signing.BadSignature, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != self.ordering_name or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        data = {'p': position, 'r': int(reverse), 'o': self.ordering_name}
+        encoded = signing.dumps(data, salt=self.cursor_salt, compress=True)
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_keyset_filter(self, position, reverse):
+        """ (a > x) OR (a = x AND b > y) ... for the ordering columns """
+        lookup = 'lt' if reverse else 'gt'
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            term = Q(**{'%s__%s' % (field, lookup): position[index]})
+            for previous, value in zip(self.ordering[:index], position):
+                term &= Q(**{previous: value})
+            condition |= term
+        return condition
+
+    def get_position(self, obj):
+        position = []
+        for field in self.ordering:
+            value = obj[field] if isinstance(obj, Mapping) else getattr(obj, field)
+            if isinstance(value, (datetime.datetime, datetime.date)):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering_name, self.ordering = self.get_ordering(request)
+        cursor = self.decode_cursor(request)
+
+        reverse = False
+        if cursor is not None:
+            position, reverse = cursor
+            queryset = queryset.filter(self.get_keyset_filter(position, reverse))
+
+        if reverse:
+            queryset = queryset.order_by(*['-%s' % field for field in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
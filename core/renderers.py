@@ -0,0 +1,175 @@
+import csv
+import json
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+ORJSON_OPTIONS = orjson and orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+# los tipos que orjson no conoce (Decimal, textos lazy, querysets...) se codifican como en DRF
+encode_default = JSONEncoder().default
+
+
+def dumps(data):
+    """ compact utf-8 json, with orjson when it is installed """
+    if orjson is not None:
+        return orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def flatten(row, prefix=''):
+    """ nested dicts as dotted columns, {'state': {'id': 1}} -> {'state.id': 1} """
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, '%s%s.' % (prefix, key)))
+        else:
+            flat['%s%s' % (prefix, key)] = value
+    return flat
+
+
+class Echo:
+    """ file-like object that returns what is written, used to stream csv rows """
+
+    def write(self, value):
+        return value
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson, same output as the DRF one (utc as Z,
+    no ascii escaping, compact) and it falls back to it without orjson
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        option = ORJSON_OPTIONS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        content = orjson.dumps(data, default=encode_default, option=option)
+        # como JSONRenderer, U+2028 y U+2029 se escapan para poder usar la respuesta en javascript
+        if b'\xe2\x80' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    renderer that can also write rows one by one for a StreamingHttpResponse,
+    render() is used for everything that is not a streamed list. Paginated
+    renderers stream only the views without pagination
+    """
+    paginated = False
+
+    def stream(self, rows):
+        raise NotImplementedError('.stream() must be implemented.')
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return b''.join(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8') for chunk in self.stream(rows))
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """ one json document per line """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def stream(self, rows):
+        for row in rows:
+            yield dumps(row) + b'\n'
+
+
+class CSVRenderer(StreamingRenderer):
+    """ comma separated rows, nested objects are flattened into dotted columns """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        header = None
+        for row in rows:
+            row = flatten(row)
+            if header is None:
+                header = list(row)
+                yield writer.writerow(header)
+            yield writer.writerow([row.get(column) for column in header])
+
+
+class ColumnarJSONRenderer(StreamingRenderer):
+    """
+    lists as {"columns": [...], "rows": [[...]]} so keys are not repeated per
+    row, nested objects are flattened into dotted columns. A paginated page
+    keeps next and previous, anything that is not a list is plain json
+    """
+    media_type = 'application/vnd.columnar+json'
+    format = 'columnar'
+    charset = None
+    paginated = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, list):
+            return dumps(self.get_table(data))
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            page = {key: value for key, value in data.items() if key != 'results'}
+            page.update(self.get_table(data['results']))
+            return dumps(page)
+        return dumps(data)
+
+    def get_table(self, rows):
+        rows = [flatten(row) for row in rows]
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        return {'columns': columns, 'rows': [[row.get(column) for column in columns] for row in rows]}
+
+    def stream(self, rows):
+        columns = None
+        for row in rows:
+            row = flatten(row)
+            if columns is None:
+                columns = list(row)
+                yield b'{"columns":' + dumps(columns) + b',"rows":[' + dumps([row.get(column) for column in columns])
+            else:
+                yield b',' + dumps([row.get(column) for column in columns])
+        yield b'{"columns":[],"rows":[]}' if columns is None else b']}'
+
+
+class MessagePackRenderer(StreamingRenderer):
+    """
+    MessagePack, a streamed export is a sequence of objects, one per row,
+    read with msgpack.Unpacker
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    paginated = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default)
+
+    def stream(self, rows):
+        packer = msgpack.Packer(default=encode_default)
+        for row in rows:
+            yield packer.pack(row)
+
+
+# formatos compactos para clientes que leen tablas completas, msgpack solo si esta instalado
+COMPACT_RENDERER_CLASSES = [ColumnarJSONRenderer] + ([MessagePackRenderer] if msgpack is not None else [])
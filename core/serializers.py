@@ -0,0 +1,26 @@
+from rest_framework.serializers import raise_errors_on_nested_writes
+from rest_framework.utils import model_meta
+
+
+class UpdateChangedMixin:
+    """
+    model serializer mixin, update writes only the changed columns with one
+    save_changed() of core.models.DirtyFieldsMixin and skips the UPDATE when
+    the payload did not change anything
+    """
+
+    def update(self, instance, validated_data):
+        raise_errors_on_nested_writes('update', self, validated_data)
+        info = model_meta.get_field_info(instance)
+
+        many_to_many = []
+        for attr, value in validated_data.items():
+            if attr in info.relations and info.relations[attr].to_many:
+                many_to_many.append((attr, value))
+            else:
+                setattr(instance, attr, value)
+        instance.save_changed()
+
+        for attr, value in many_to_many:
+            getattr(instance, attr).set(value)
+        return instance
@@ -0,0 +1,29 @@
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+from core.renderers import StreamingRenderer, NDJSONRenderer, CSVRenderer, COMPACT_RENDERER_CLASSES
+
+
+class StreamingExportMixin:
+    """
+    export of the whole list with ?format=ndjson or ?format=csv, rows are read
+    with a server side cursor and written as they are serialized so memory
+    stays flat whatever the size of the table. ?format=columnar and
+    ?format=msgpack follow the pagination and stream when there is none
+    """
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + COMPACT_RENDERER_CLASSES + [NDJSONRenderer, CSVRenderer]
+    export_chunk_size = 2000
+
+    def list(self, request, *args, **kwargs):
+        renderer = getattr(request, 'accepted_renderer', None)
+        if not isinstance(renderer, StreamingRenderer) or (renderer.paginated and self.paginator is not None):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        rows = (serializer.to_representation(obj) for obj in queryset.iterator(chunk_size=self.export_chunk_size))
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = '%s; charset=%s' % (content_type, renderer.charset)
+        response = StreamingHttpResponse(renderer.stream(rows), content_type=content_type)
+        response['Content-Disposition'] = 'attachment; filename="%s.%s"' % (self.basename, renderer.format)
+        return response
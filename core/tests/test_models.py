@@ -1,4 +1,7 @@
+import importlib
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from core.models import Country, State, City
 from django.contrib.auth import get_user_model
 
@@ -80,3 +83,87 @@ class TestsModels(TestCase):
         state = State.objects.create(name='state', code=1, country=country)
         city = City.objects.create(name='city', code=1, state=state)
         self.assertEqual(str(city), city.name)
+
+
+class DirtyFieldsTest(TestCase):
+    """ pruebas de DirtyFieldsMixin """
+
+    def setUp(self):
+        self.country = Country.objects.create(name='Colombia', code=170)
+        self.state = State.objects.create(name='Antioquia', code=5, country=self.country)
+
+    def test_changed_fields(self):
+        ''' solo los campos asignados con otro valor '''
+        state = State.objects.get(pk=self.state.pk)
+        self.assertEqual(state.get_changed_fields(), [])
+        state.code = 5
+        state.name = 'Bogotá'
+        self.assertEqual(state.get_changed_fields(), ['name'])
+        self.assertIsNone(State(name='Nuevo', code=1).get_changed_fields())
+
+    def test_save_changed(self):
+        ''' un UPDATE con el campo modificado y los que dependen de el '''
+        state = State.objects.get(pk=self.state.pk)
+        state.name = 'Bogotá'
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(state.save_changed())
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "core_state"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"search_name"', updates[0])
+        self.assertNotIn('"code"', updates[0])
+        self.assertEqual(State.objects.get(pk=self.state.pk).search_name, 'bogota')
+        self.assertEqual(state.get_changed_fields(), [])
+
+    def test_save_unchanged(self):
+        ''' sin cambios no escribe '''
+        state = State.objects.get(pk=self.state.pk)
+        state.name = 'Antioquia'
+        with self.assertNumQueries(0):
+            self.assertFalse(state.save_changed())
+
+    def test_deferred(self):
+        ''' un campo diferido asignado se guarda '''
+        state = State.objects.only('id').get(pk=self.state.pk)
+        state.code = 6
+        self.assertEqual(state.get_changed_fields(), ['code'])
+        state.save_changed()
+        self.assertEqual(State.objects.get(pk=self.state.pk).code, 6)
+
+    def test_refresh_from_db(self):
+        ''' refresh_from_db actualiza los valores originales '''
+        state = State.objects.get(pk=self.state.pk)
+        State.objects.filter(pk=state.pk).update(code=7)
+        state.refresh_from_db()
+        state.code = 5
+        self.assertEqual(state.get_changed_fields(), ['code'])
+
+
+class EmailLowerTest(TestCase):
+    """ pruebas del indice unico sobre LOWER(email) """
+
+    def test_unique_case_insensitive(self):
+        ''' la base rechaza el mismo correo con otras mayusculas '''
+        sampleUser(email='Test@test.com')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            sampleUser(email='test@TEST.com')
+
+    def test_get_by_natural_key(self):
+        ''' una consulta con LOWER sobre el correo '''
+        user = sampleUser(email='Test@test.com')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_user_model().objects.get_by_natural_key('TEST@test.com'), user)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('LOWER(', queries[0]['sql'])
+
+    def test_find_email_collisions(self):
+        ''' la migracion reporta los correos repetidos por lotes '''
+        migration = importlib.import_module('core.migrations.0013_user_email_lower')
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX user_email_lower_unique')
+        for email in ('a@test.com', 'A@test.com', 'b@test.com', 'B@TEST.com', 'c@test.com'):
+            get_user_model().objects.create(email=email, name='test')
+        batches = list(migration.find_email_collisions(get_user_model().objects.all(), batch_size=1))
+        self.assertEqual(batches, [
+            [('a@test.com', ['a@test.com', 'A@test.com'])],
+            [('b@test.com', ['b@test.com', 'B@TEST.com'])],
+        ])
@@ -0,0 +1,115 @@
+import datetime
+import decimal
+import io
+import json
+import unittest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer, ColumnarJSONRenderer, MessagePackRenderer, orjson, msgpack
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    """ pruebas del renderer y parser json con orjson """
+
+    def assertSameAsDRF(self, data):
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_same_output(self):
+        ''' misma salida que el JSONRenderer de DRF '''
+        self.assertSameAsDRF({
+            'name': 'Bogotá ñ',
+            'phone': 3213860504,
+            'no_identification': 9223372036854775807,
+            'created': datetime.datetime(2022, 4, 1, 10, 30, 5, 123456, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2022, 4, 1),
+            'amount': decimal.Decimal('10.50'),
+            'message': gettext_lazy('Not found.'),
+            'line': 'a\u2028b\u2029',
+            'results': [{'id': 1}],
+        })
+
+    def test_none(self):
+        ''' respuesta vacia '''
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_parse(self):
+        ''' parser lee json utf-8 '''
+        data = ORJSONParser().parse(io.BytesIO('{"name": "Medellín", "phone": 3213860504}'.encode('utf-8')))
+        self.assertEqual(data, {'name': 'Medellín', 'phone': 3213860504})
+
+    def test_parse_latin1(self):
+        ''' parser con otra codificacion usa el de DRF '''
+        content = '{"name": "Medellín"}'.encode('latin-1')
+        data = ORJSONParser().parse(io.BytesIO(content), parser_context={'encoding': 'latin-1'})
+        self.assertEqual(data, JSONParser().parse(io.BytesIO(content), parser_context={'encoding': 'latin-1'}))
+
+    def test_parse_error(self):
+        ''' json invalido responde ParseError '''
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"name": '))
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_indent(self):
+        ''' indentacion pedida en el accept '''
+        content = ORJSONRenderer().render({'id': 1}, 'application/json; indent=4')
+        self.assertEqual(content, b'{\n  "id": 1\n}')
+
+
+class CompactRendererTest(SimpleTestCase):
+    """ pruebas de los formatos columnar y msgpack """
+    rows = [
+        {'id': 1, 'name': 'Medellín', 'state': {'id': 5, 'name': 'Antioquia'}},
+        {'id': 2, 'name': 'Bello', 'state': {'id': 5, 'name': 'Antioquia'}},
+    ]
+
+    def test_columnar_page(self):
+        ''' pagina con columnas aplanadas y los cursores '''
+        data = {'next': 'http://testserver/?cursor=x', 'previous': None, 'results': self.rows}
+        content = json.loads(ColumnarJSONRenderer().render(data))
+        self.assertEqual(content['columns'], ['id', 'name', 'state.id', 'state.name'])
+        self.assertEqual(content['rows'][1], [2, 'Bello', 5, 'Antioquia'])
+        self.assertEqual(content['next'], data['next'])
+        self.assertNotIn('results', content)
+
+    def test_columnar_stream(self):
+        ''' stream igual a render de la lista '''
+        renderer = ColumnarJSONRenderer()
+        self.assertEqual(b''.join(renderer.stream(iter(self.rows))), renderer.render(self.rows))
+        self.assertEqual(json.loads(b''.join(renderer.stream(iter([])))), {'columns': [], 'rows': []})
+
+    def test_columnar_detail(self):
+        ''' un objeto se devuelve como json normal '''
+        self.assertEqual(json.loads(ColumnarJSONRenderer().render({'detail': 'Not found.'})), {'detail': 'Not found.'})
+
+    @unittest.skipIf(msgpack is None, 'msgpack is not installed')
+    def test_msgpack(self):
+        ''' msgpack de una pagina y stream de objetos '''
+        renderer = MessagePackRenderer()
+        data = {'next': None, 'results': self.rows, 'message': gettext_lazy('Not found.')}
+        self.assertEqual(msgpack.unpackb(renderer.render(data))['message'], 'Not found.')
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(b''.join(renderer.stream(iter(self.rows))))
+        self.assertEqual(list(unpacker), self.rows)
+
+
+class ORJSONUserTest(TestCase):
+    """ fechas del usuario con el renderer por defecto """
+
+    def test_user_dates(self):
+        ''' created y updated igual que DRF '''
+        user = get_user_model().objects.create_user(email='test@test.com', password='test123')
+        data = {'created': user.created, 'updated': user.updated}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_benchmark_command(self):
+        ''' comando de benchmark con pocas filas '''
+        out = io.StringIO()
+        call_command('benchmark_renderers', rows=10, repeat=1, stdout=out)
+        self.assertIn('render: drf', out.getvalue())
+        self.assertIn('parse: drf', out.getvalue())
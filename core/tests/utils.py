@@ -0,0 +1,20 @@
+from contextlib import contextmanager
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """ assertion helpers to keep the number of queries of an endpoint bounded """
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        ''' falla si el bloque ejecuta mas de `budget` consultas '''
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                '%d. %s' % (index, query['sql'])
+                for index, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail('%d queries executed, budget is %d\nCaptured queries were:\n%s' % (executed, budget, queries))
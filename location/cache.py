@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.cache import caches
+
+RESPONSE_KEY = 'location:response:%s:%s:%s'
+STATS_KEY = 'location:stats:%s'
+
+
+def get_cache():
+    """ cache backend configured for location reference data """
+    return caches[getattr(settings, 'LOCATION_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'LOCATION_CACHE_TIMEOUT', 60 * 60)
+
+
+def get_versions_key(versions):
+    """ core.Revision versions shared by every process, a write in any worker changes the key """
+    return '.'.join(str(version) for version in versions)
+
+
+def get_response_key(basename, versions, url):
+    return RESPONSE_KEY % (basename, get_versions_key(versions), url)
+
+
+def record(hit):
+    cache = get_cache()
+    key = STATS_KEY % ('hits' if hit else 'misses')
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_stats():
+    cache = get_cache()
+    stats = cache.get_many([STATS_KEY % 'hits', STATS_KEY % 'misses'])
+    return {
+        'hits': stats.get(STATS_KEY % 'hits', 0),
+        'misses': stats.get(STATS_KEY % 'misses', 0),
+    }
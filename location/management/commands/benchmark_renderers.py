@@ -0,0 +1,52 @@
+import io
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from core.benchmark import measure
+from core.models import Country, State, City
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer, orjson
+from location.serializer import CityListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare DRF JSONRenderer/JSONParser against core.renderers.ORJSONRenderer/core.parsers.ORJSONParser '
+        'on a city list page, rows are built in memory so the database is not touched'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        country = Country(id=1, name='Colombia', code=170, updated=now)
+        states = [
+            State(id=index, name='Departamento %s' % index, search_name='departamento %s' % index,
+                  code=index, country=country, updated=now)
+            for index in range(1, 34)
+        ]
+        cities = [
+            City(id=index, name='Ciudad ñandú %s' % index, search_name='ciudad nandu %s' % index,
+                 code=index, state=states[index % len(states)], updated=now)
+            for index in range(1, options['rows'] + 1)
+        ]
+        data = {'next': None, 'previous': None, 'results': CityListSerializer(cities, many=True).data}
+        content = JSONRenderer().render(data)
+
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed, ORJSONRenderer falls back to JSONRenderer'))
+        self.stdout.write('%d cities, %d bytes, best of %d' % (len(cities), len(content), options['repeat']))
+        for label, default, fast in (
+            ('render', lambda: JSONRenderer().render(data), lambda: ORJSONRenderer().render(data)),
+            ('parse', lambda: JSONParser().parse(io.BytesIO(content)), lambda: ORJSONParser().parse(io.BytesIO(content))),
+        ):
+            default_time = measure(default, options['repeat'])
+            fast_time = measure(fast, options['repeat'])
+            self.stdout.write(
+                '%s: drf %.2fms, orjson %.2fms, %.1fx' % (
+                    label, default_time * 1000, fast_time * 1000, default_time / fast_time if fast_time else 0,
+                )
+            )
@@ -0,0 +1,204 @@
+import csv
+import json
+import re
+import time
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from core.fields import normalize_search
+from core.models import Country, State, City
+from location.signals import location_bulk_changed
+
+
+WHITESPACE = re.compile(r'\s*')
+
+
+def read_json_array(source, chunk_size=1 << 16):
+    """ (line, item) of a json array decoded one item at a time, the file is read in chunks """
+    decoder = json.JSONDecoder()
+    buffer, index, eof = '', 0, False
+    line, counted = 1, 0
+    state = 'start'
+    while True:
+        index = WHITESPACE.match(buffer, index).end()
+        if index == len(buffer):
+            if eof:
+                raise CommandError('line %d: unexpected end of the json array' % line)
+            line += buffer.count('\n', counted)
+            buffer, index, counted = source.read(chunk_size), 0, 0
+            eof = not buffer
+            continue
+        char = buffer[index]
+        if state == 'start':
+            if char != '[':
+                raise CommandError('line %d: expected a json array' % line)
+            index, state = index + 1, 'first'
+            continue
+        if state in ('first', 'next') and char == ']':
+            return
+        if state == 'next':
+            if char != ',':
+                raise CommandError('line %d: expected , or ] in the json array' % (line + buffer.count('\n', counted, index)))
+            index, state = index + 1, 'item'
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer, index)
+        except json.JSONDecodeError as exc:
+            if eof:
+                raise CommandError('line %d: %s' % (line + buffer.count('\n', counted, index), exc.msg))
+            # el elemento sigue en el siguiente bloque
+            line += buffer.count('\n', counted, index)
+            chunk = source.read(chunk_size)
+            buffer, index, counted = buffer[index:] + chunk, 0, 0
+            eof = not chunk
+            continue
+        line += buffer.count('\n', counted, index)
+        counted = index
+        yield line, item
+        index, state = end, 'next'
+
+
+def read_rows(path):
+    """ (line, row) of a csv file, a json lines file or a json array, read one row at a time """
+    with open(path, newline='', encoding='utf-8') as source:
+        if path.endswith('.csv'):
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        first = source.read(1)
+        while first.isspace():
+            first = source.read(1)
+        source.seek(0)
+        if first == '[':
+            yield from read_json_array(source)
+            return
+        for line, text in enumerate(source, start=1):
+            if text.strip():
+                try:
+                    yield line, json.loads(text)
+                except json.JSONDecodeError as exc:
+                    raise CommandError('%s line %d: %s' % (path, line, exc.msg))
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+class Command(BaseCommand):
+    help = (
+        'Import countries, states and cities from csv or json lines files, upserting by code. '
+        'countries: code,name - states: code,name[,country_code] - cities: code,name,state_code[,country_code]'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--countries', help='countries file')
+        parser.add_argument('--states', help='states file')
+        parser.add_argument('--cities', help='cities file')
+        parser.add_argument('--country', type=int, help='country code for rows without country_code')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not (options['countries'] or options['states'] or options['cities']):
+            raise CommandError('give at least one of --countries, --states or --cities')
+        self.batch_size = options['batch_size']
+        self.default_country = options['country']
+
+        if options['countries']:
+            self.import_file(options['countries'], Country, self.country_key)
+        self.country_ids = dict(Country.objects.values_list('code', 'id'))
+        if options['states']:
+            self.import_file(options['states'], State, self.state_key)
+        if options['cities']:
+            self.state_ids = {
+                (country_code, code): pk
+                for country_code, code, pk in State.objects.values_list('country__code', 'code', 'id')
+            }
+            self.import_file(options['cities'], City, self.city_key)
+
+    def country_key(self, row):
+        return None, int(row['code'])
+
+    def state_key(self, row):
+        country_code = row.get('country_code') or self.default_country
+        if country_code is None:
+            raise CommandError('state rows need a country_code column or the --country option')
+        return self.country_ids.get(int(country_code)), int(row['code'])
+
+    def city_key(self, row):
+        country_code = row.get('country_code') or self.default_country
+        if country_code is None:
+            raise CommandError('city rows need a country_code column or the --country option')
+        return self.state_ids.get((int(country_code), int(row['state_code']))), int(row['code'])
+
+    def import_file(self, path, model, get_key):
+        started = time.monotonic()
+        total = created = updated = skipped = 0
+        try:
+            for batch in batches(read_rows(path), self.batch_size):
+                rows = {}
+                for line, row in batch:
+                    total += 1
+                    try:
+                        parent_id, code = get_key(row)
+                        name = row['name'].strip()
+                    except CommandError as exc:
+                        raise CommandError('%s line %d: %s' % (path, line, exc))
+                    except (KeyError, TypeError, ValueError, AttributeError) as exc:
+                        raise CommandError('%s line %d: invalid row %r (%s: %s)' % (path, line, row, type(exc).__name__, exc))
+                    if model is not Country and parent_id is None:
+                        skipped += 1
+                        continue
+                    rows[(parent_id, code)] = name
+                batch_created, batch_updated = self.upsert(model, rows)
+                created += batch_created
+                updated += batch_updated
+        finally:
+            # los lotes ya guardados invalidan el cache aunque un lote posterior falle
+            location_bulk_changed(model)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            '%s: %d rows (%d created, %d updated, %d skipped) in %.2fs, %d rows/s' % (
+                model._meta.verbose_name_plural, total, created, updated, skipped,
+                elapsed, total / elapsed if elapsed else total,
+            )
+        )
+
+    def upsert(self, model, rows):
+        """ one lookup per batch, then bulk_update changed names and bulk_create new codes """
+        parent = {Country: None, State: 'country_id', City: 'state_id'}[model]
+        lookup = {'code__in': {code for parent_id, code in rows}}
+        if parent:
+            lookup['%s__in' % parent] = {parent_id for parent_id, code in rows}
+        existing = {
+            (getattr(obj, parent) if parent else None, obj.code): obj
+            for obj in model.objects.filter(**lookup).only('id', 'name', 'code', *([parent] if parent else []))
+        }
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        for (parent_id, code), name in rows.items():
+            obj = existing.get((parent_id, code))
+            if obj is None:
+                fields = {'code': code, 'name': name}
+                if parent:
+                    fields[parent] = parent_id
+                to_create.append(model(**fields))
+            elif obj.name != name:
+                obj.name = name
+                obj.updated = now
+                if parent:
+                    obj.search_name = normalize_search(name)
+                to_update.append(obj)
+
+        fields = ['name', 'updated'] + (['search_name'] if parent else [])
+        with transaction.atomic():
+            model.objects.bulk_create(to_create, batch_size=self.batch_size)
+            model.objects.bulk_update(to_update, fields, batch_size=self.batch_size)
+        return len(to_create), len(to_update)
@@ -0,0 +1,139 @@
+import hashlib
+from calendar import timegm
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from core.bulk import BulkModelMixin
+from core.fields import normalize_search
+from core.models import Revision
+from location import cache
+from location.signals import location_bulk_changed
+
+
+class RevisionMixin:
+    """ versions of the models rendered by the view, one lookup per request """
+    model_dependencies = ()
+
+    def get_versions(self):
+        if getattr(self, '_versions', None) is None:
+            self._versions = Revision.objects.get_versions(self.model_dependencies)
+        return self._versions
+
+
+class ConditionalGetMixin(RevisionMixin):
+    """
+    ETag and Last-Modified from the revision of every model rendered, a
+    matching If-None-Match is answered with 304 before touching the rows
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_validators(self, request):
+        """ (etag, last_modified) from one indexed lookup on core.Revision """
+        versions = self.get_versions()
+        if len(versions) != len(self.model_dependencies):
+            return None, None
+        tag = ':'.join(
+            [request.get_full_path(), request.accepted_media_type or '']
+            + ['%s.%s' % (name, versions[name][0]) for name in self.model_dependencies]
+        )
+        etag = quote_etag(hashlib.sha1(tag.encode('utf-8')).hexdigest())
+        last_modified = max(timegm(updated.utctimetuple()) for version, updated in versions.values())
+        return etag, last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class CachedResponseMixin(RevisionMixin):
+    """
+    read-through cache of list and retrieve responses, the key carries the
+    revision of every model rendered so writes invalidate it
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_key(self, request):
+        versions = self.get_versions()
+        url = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+        return cache.get_response_key(self.basename, [versions.get(name, (0, None))[0] for name in self.model_dependencies], url)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        data = cache.get_cache().get(key)
+        if data is not None:
+            cache.record(hit=True)
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.get_cache().set(key, response.data, cache.get_timeout())
+            cache.record(hit=False)
+            response['X-Cache'] = 'MISS'
+        return response
+
+
+class LocationBulkMixin(BulkModelMixin):
+    """ bulk endpoints that invalidate the location caches after the write """
+
+    def perform_bulk_write(self, instances):
+        location_bulk_changed(self.queryset.model)
+
+
+class AutocompleteMixin:
+    """
+    accent-insensitive prefix search over the indexed search_name column,
+    ?search= filters the list and autocomplete/?q= returns ranked matches
+    with the names of the parents from the same query
+    """
+    autocomplete_values = {}
+    autocomplete_limit = 10
+    autocomplete_max_limit = 50
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        search = normalize_search(self.request.query_params.get('search'))
+        if self.action == 'list' and search:
+            queryset = queryset.filter(search_name__startswith=search)
+        return queryset
+
+    @action(detail=False)
+    def autocomplete(self, request, *args, **kwargs):
+        query = normalize_search(request.query_params.get('q'))
+        if not query:
+            return Response([])
+        try:
+            limit = int(request.query_params.get('limit', self.autocomplete_limit))
+        except ValueError:
+            limit = self.autocomplete_limit
+        limit = max(1, min(limit, self.autocomplete_max_limit))
+
+        rows = (
+            self.queryset.model.objects
+            .filter(search_name__startswith=query)
+            .annotate(rank=Case(When(search_name=query, then=Value(0)), default=Value(1), output_field=IntegerField()))
+            .order_by('rank', 'search_name', 'id')
+            .values('id', 'name', 'code', **{key: F(path) for key, path in self.autocomplete_values.items()})
+        )
+        return Response(list(rows[:limit]))
@@ -1,8 +1,12 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
 from core.models import Country, State, City
+from core.bulk import BulkPrimaryKeyRelatedField
+from core.fieldsets import DynamicFieldsMixin
+from core.serializers import UpdateChangedMixin
 
 
-class CountrySerializer(serializers.ModelSerializer):
+class CountrySerializer(UpdateChangedMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """ Model serializer from Country model """
 
     class Meta:
@@ -11,27 +15,67 @@ class CountrySerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class StateSerializer(serializers.ModelSerializer):
+class StateSerializer(UpdateChangedMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """ Model serializer from state model """
+    serializer_related_field = BulkPrimaryKeyRelatedField
+    expandable_fields = {'country': CountrySerializer}
+
     class Meta:
         model = State
         fields = ('id', 'name', 'code', 'country')
         read_only_fields = ('id',)
+        # drf no genera validadores para Meta.constraints
+        validators = [
+            UniqueTogetherValidator(queryset=State.objects.all(), fields=('country', 'code')),
+        ]
 
 
 class StateListSerializer(StateSerializer):
-    class Meta(StateSerializer.Meta):
-        depth = 1
+    """ country nested with the fields of CountrySerializer """
+    country = CountrySerializer(read_only=True)
 
 
-class CitySerializer(serializers.ModelSerializer):
+class CitySerializer(UpdateChangedMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """ Model serializer from city model """
+    serializer_related_field = BulkPrimaryKeyRelatedField
+    expandable_fields = {'state': StateSerializer}
+
     class Meta:
         model = City
         fields = ('id', 'name', 'code', 'state')
         read_only_fields = ('id',)
+        # drf no genera validadores para Meta.constraints
+        validators = [
+            UniqueTogetherValidator(queryset=City.objects.all(), fields=('state', 'code')),
+        ]
 
 
 class CityListSerializer(CitySerializer):
-    class Meta(CitySerializer.Meta):
-        depth = 1
+    """ state nested with the fields of StateSerializer """
+    state = StateSerializer(read_only=True)
+
+
+class CityTreeSerializer(serializers.ModelSerializer):
+    """ city inside the tree of a country """
+
+    class Meta:
+        model = City
+        fields = ('id', 'name', 'code')
+
+
+class StateTreeSerializer(serializers.ModelSerializer):
+    """ state with its cities inside the tree of a country """
+    cities = CityTreeSerializer(many=True, read_only=True, source='tree_cities')
+
+    class Meta:
+        model = State
+        fields = ('id', 'name', 'code', 'cities')
+
+
+class CountryTreeSerializer(serializers.ModelSerializer):
+    """ country with its states and their cities """
+    states = StateTreeSerializer(many=True, read_only=True, source='tree_states')
+
+    class Meta:
+        model = Country
+        fields = ('id', 'name', 'code', 'states')
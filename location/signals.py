@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from core.models import Country, State, City, Revision, Tombstone
+from location import snapshots
+
+
+def location_changed(sender, **kwargs):
+    """ invalidate cached location responses after a write, their keys carry the revision """
+    Revision.objects.bump(sender._meta.model_name)
+    transaction.on_commit(snapshots.schedule_snapshot)
+
+
+def location_bulk_changed(model):
+    """ bulk_create and bulk_update do not send signals, call this after them """
+    location_changed(sender=model)
+
+
+def location_deleted(sender, instance, **kwargs):
+    """ keep a tombstone so delta sync clients learn about the delete """
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk)
+
+
+for model in (Country, State, City):
+    post_save.connect(location_changed, sender=model, dispatch_uid='location_changed_save_%s' % model._meta.model_name)
+    post_delete.connect(location_changed, sender=model, dispatch_uid='location_changed_delete_%s' % model._meta.model_name)
+    post_delete.connect(location_deleted, sender=model, dispatch_uid='location_deleted_%s' % model._meta.model_name)
@@ -0,0 +1,235 @@
+import gzip
+import logging
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connections, router
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from core.models import Country, State, City, Revision
+from core.renderers import ORJSONRenderer
+from location import cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+TREE_SNAPSHOT_KEY = 'location:tree:%s:%s'
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+ACCEPTS_BROTLI = re.compile(r'\bbr\b')
+SNAPSHOT_NAME = 'locations.json'
+SNAPSHOT_REVISIONS = ('country', 'state', 'city')
+SNAPSHOT_LOCK_KEY = 'location:snapshot:lock'
+# llave de pg_try_advisory_lock, un bigint fijo para todo el proyecto
+SNAPSHOT_LOCK_ID = 7164230481759320001
+
+_timer = None
+_timer_lock = threading.Lock()
+
+
+def accepts_gzip(request):
+    return bool(ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+
+
+def accepts_brotli(request):
+    return bool(ACCEPTS_BROTLI.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+
+
+def get_country_tree(pk):
+    """
+    country with tree_states and tree_cities attributes, the states come with
+    their country in one query and all the cities in a second one
+    """
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        raise Http404
+    states = list(State.objects.select_related('country').filter(country_id=pk).order_by('name', 'id'))
+    if states:
+        country = states[0].country
+    else:
+        country = get_object_or_404(Country, pk=pk)
+
+    cities = {}
+    for city in City.objects.filter(state__country_id=pk).only('id', 'name', 'code', 'state_id').order_by('name', 'id'):
+        cities.setdefault(city.state_id, []).append(city)
+    for state in states:
+        state.tree_cities = cities.get(state.id, [])
+    country.tree_states = states
+    country.tree_size = sum(len(state.tree_cities) for state in states)
+    return country
+
+
+def get_tree_snapshot_key(pk):
+    versions = Revision.objects.get_versions(SNAPSHOT_REVISIONS)
+    return TREE_SNAPSHOT_KEY % (pk, cache.get_versions_key(versions.get(name, (0, None))[0] for name in SNAPSHOT_REVISIONS))
+
+
+def get_tree_snapshot(key):
+    """ gzip compressed json of the tree, None if it was not precomputed """
+    return cache.get_cache().get(key)
+
+
+def store_tree_snapshot(key, data):
+    """
+    keep the tree compressed when the country is big enough to be worth it,
+    under the key read before rendering so a concurrent write is not hidden
+    """
+    content = gzip.compress(ORJSONRenderer().render(data))
+    cache.get_cache().set(key, content, cache.get_timeout())
+    return content
+
+
+def should_snapshot_tree(country):
+    minimum = getattr(settings, 'LOCATION_TREE_SNAPSHOT_MIN_CITIES', 1000)
+    return minimum is not None and country.tree_size >= minimum
+
+
+def tree_snapshot_response(request, content):
+    if accepts_gzip(request):
+        response = HttpResponse(content, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(content), content_type='application/json')
+    response['Content-Length'] = len(response.content)
+    response['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def get_snapshot_dir():
+    return os.path.join(settings.MEDIA_ROOT, 'location')
+
+
+def get_snapshot_version():
+    """ revisions of the tables in the snapshot, one indexed lookup """
+    versions = Revision.objects.get_versions(SNAPSHOT_REVISIONS)
+    return '-'.join(str(versions.get(name, (0, None))[0]) for name in SNAPSHOT_REVISIONS)
+
+
+def read_snapshot_version():
+    try:
+        with open(os.path.join(get_snapshot_dir(), SNAPSHOT_NAME + '.version')) as version_file:
+            return version_file.read().strip()
+    except OSError:
+        return None
+
+
+def write_file(directory, name, content):
+    """ write next to the target and rename, readers never see a partial file """
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.' + name)
+    with os.fdopen(descriptor, 'wb') as target:
+        target.write(content)
+    os.replace(temporary, os.path.join(directory, name))
+
+
+def build_snapshot():
+    """
+    render every country, state and city once and store the json with its
+    gzip and brotli variants under MEDIA_ROOT/location/
+    """
+    from location.serializer import CountrySerializer, StateSerializer, CitySerializer
+
+    version = get_snapshot_version()
+    data = {
+        'countries': CountrySerializer(Country.objects.order_by('id'), many=True).data,
+        'states': StateSerializer(State.objects.order_by('id'), many=True).data,
+        'cities': CitySerializer(City.objects.order_by('id'), many=True).data,
+    }
+    content = ORJSONRenderer().render(data)
+
+    directory = get_snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    write_file(directory, SNAPSHOT_NAME, content)
+    write_file(directory, SNAPSHOT_NAME + '.gz', gzip.compress(content, compresslevel=9))
+    if brotli is not None:
+        write_file(directory, SNAPSHOT_NAME + '.br', brotli.compress(content))
+    write_file(directory, SNAPSHOT_NAME + '.version', version.encode('utf-8'))
+    return version
+
+
+def _rebuild_snapshot():
+    global _timer
+    with _timer_lock:
+        _timer = None
+    try:
+        build_snapshot()
+    except Exception:
+        logger.exception('location snapshot rebuild failed')
+    finally:
+        connections.close_all()
+
+
+def schedule_snapshot():
+    """ debounced rebuild, a burst of writes only renders the snapshot once """
+    global _timer
+    delay = getattr(settings, 'LOCATION_SNAPSHOT_DEBOUNCE', 5)
+    if delay is None:
+        return
+    with _timer_lock:
+        if _timer is not None:
+            _timer.cancel()
+        _timer = threading.Timer(delay, _rebuild_snapshot)
+        _timer.daemon = True
+        _timer.start()
+
+
+@contextmanager
+def snapshot_lock():
+    """
+    True when this process holds the rebuild lock. On postgres it is an
+    advisory lock shared by every worker and released with the session if
+    the process dies, other databases fall back to the location cache
+    """
+    connection = connections[router.db_for_write(Revision)]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [SNAPSHOT_LOCK_ID])
+            acquired = cursor.fetchone()[0]
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock(%s)', [SNAPSHOT_LOCK_ID])
+        return
+
+    lock = cache.get_cache()
+    acquired = lock.add(SNAPSHOT_LOCK_KEY, 1, getattr(settings, 'LOCATION_SNAPSHOT_LOCK_TIMEOUT', 60))
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.delete(SNAPSHOT_LOCK_KEY)
+
+
+def rebuild_stale_snapshot(current):
+    """
+    only the request holding the lock renders the snapshot, the others keep
+    serving the previous files until the new ones are renamed in place
+    """
+    with snapshot_lock() as acquired:
+        if acquired or current is None:
+            # without previous files to serve the request renders its own
+            return build_snapshot()
+        return current
+
+
+def get_snapshot_file(request):
+    """ (path, content encoding) of the variant the client accepts, rebuilt when stale """
+    version = get_snapshot_version()
+    current = read_snapshot_version()
+    if current != version:
+        version = rebuild_stale_snapshot(current)
+
+    path = os.path.join(get_snapshot_dir(), SNAPSHOT_NAME)
+    if accepts_brotli(request) and os.path.exists(path + '.br'):
+        return path + '.br', 'br', version
+    if accepts_gzip(request):
+        return path + '.gz', 'gzip', version
+    return path, None, version
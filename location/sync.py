@@ -0,0 +1,102 @@
+import datetime
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from core.models import Country, State, City, Tombstone
+from location.serializer import CountrySerializer, StateSerializer, CitySerializer
+
+SYNC_RESOURCES = (
+    ('countries', Country, CountrySerializer),
+    ('states', State, StateSerializer),
+    ('cities', City, CitySerializer),
+)
+TOKEN_SALT = 'location.sync'
+CURSOR_SALT = 'location.sync.cursor'
+# las filas confirmadas tarde pueden tener un updated anterior al token
+SYNC_MARGIN = datetime.timedelta(seconds=5)
+
+
+def make_token(moment):
+    return signing.dumps(moment.isoformat(), salt=TOKEN_SALT)
+
+
+def read_token(token):
+    """ datetime of a sync token, ValueError if it was not issued by us """
+    try:
+        moment = parse_datetime(signing.loads(token, salt=TOKEN_SALT))
+    except (signing.BadSignature, TypeError):
+        raise ValueError('invalid token')
+    if moment is None:
+        raise ValueError('invalid token')
+    return moment
+
+
+def make_cursor(moment, since, stream, last_id):
+    data = {'t': moment.isoformat(), 's': since.isoformat() if since else None, 'r': stream, 'i': last_id}
+    return signing.dumps(data, salt=CURSOR_SALT)
+
+
+def read_cursor(cursor):
+    """ (datetime, since, stream index, last id) of a sync page, ValueError if invalid """
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+        moment, stream, last_id = parse_datetime(data['t']), int(data['r']), int(data['i'])
+        since = parse_datetime(data['s']) if data['s'] else None
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise ValueError('invalid cursor')
+    if moment is None or not 0 <= stream < len(SYNC_RESOURCES) * 2:
+        raise ValueError('invalid cursor')
+    return moment, since, stream, last_id
+
+
+def get_page_size():
+    return getattr(settings, 'LOCATION_SYNC_PAGE_SIZE', 1000)
+
+
+def get_stream(model, deleted, since, last_id, limit):
+    """ (ids, rows) after last_id of the updated rows or the tombstones of the model """
+    if deleted:
+        if since is None:
+            return [], []
+        ids = list(
+            Tombstone.objects.filter(model=model._meta.model_name, deleted__gte=since - SYNC_MARGIN, object_id__gt=last_id)
+            .order_by('object_id').values_list('object_id', flat=True).distinct()[:limit]
+        )
+        return ids, ids
+    queryset = model.objects.filter(id__gt=last_id).order_by('id')
+    if since is not None:
+        queryset = queryset.filter(updated__gte=since - SYNC_MARGIN)
+    rows = list(queryset[:limit])
+    return [row.id for row in rows], rows
+
+
+def get_changes(since=None, cursor=None):
+    """
+    one page of the rows inserted, updated and deleted since the datetime,
+    every row when since is None. The updated rows and the deletes of each
+    model are read in order by id up to LOCATION_SYNC_PAGE_SIZE in total,
+    the cursor carries the time of the first page and the last page, the
+    one without cursor, returns it as the next sync token
+    """
+    if cursor is None:
+        moment, start, last_id = timezone.now(), 0, 0
+    else:
+        moment, since, start, last_id = cursor
+    remaining = get_page_size()
+    page = {}
+    cursor = None
+    for index, (key, model, serializer_class) in enumerate(SYNC_RESOURCES):
+        page[key] = {'updated': [], 'deleted': []}
+        for deleted in (False, True):
+            stream = index * 2 + deleted
+            if stream < start or cursor is not None:
+                continue
+            ids, rows = get_stream(model, deleted, since, last_id if stream == start else 0, remaining)
+            page[key]['deleted' if deleted else 'updated'] = rows if deleted else serializer_class(rows, many=True).data
+            remaining -= len(rows)
+            if not remaining:
+                cursor = make_cursor(moment, since, stream, ids[-1])
+    page['cursor'] = cursor
+    page['token'] = make_token(moment) if cursor is None else None
+    return page
@@ -0,0 +1,75 @@
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.test import TestCase
+from django.urls import reverse
+from core import models
+from core.tests.utils import QueryBudgetMixin
+from location.tests.utils import sample_country
+
+CITY_AUTOCOMPLETE_URL = reverse('location:city-autocomplete')
+STATE_AUTOCOMPLETE_URL = reverse('location:state-autocomplete')
+CITY_URL = reverse('location:city-list')
+
+
+class AutocompleteApiTest(QueryBudgetMixin, TestCase):
+    """
+    test prefix search over city and state names
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.country = sample_country(name='Colombia', code=170)
+        self.state = models.State.objects.create(name='Bogotá D.C.', code=11, country=self.country)
+        for code, name in enumerate(['Bogotá', 'Bogotá Rural', 'Boyacá', 'Medellín', 'Bojacá']):
+            models.City.objects.create(name=name, code=code, state=self.state)
+
+    def test_accent_insensitive_prefix(self):
+        """
+        test prefix without accents matches names with accents
+        """
+        with self.assertMaxQueries(1):
+            response = self.client.get(CITY_AUTOCOMPLETE_URL, {'q': 'BOGO'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['name'] for row in response.data], ['Bogotá', 'Bogotá Rural'])
+        self.assertEqual(response.data[0]['state_name'], 'Bogotá D.C.')
+        self.assertEqual(response.data[0]['country_name'], 'Colombia')
+
+    def test_exact_match_first_and_limit(self):
+        """
+        test exact match is ranked first and results are limited
+        """
+        models.City.objects.create(name='Bo', code=10, state=self.state)
+        response = self.client.get(CITY_AUTOCOMPLETE_URL, {'q': 'bo', 'limit': 3})
+        self.assertEqual([row['name'] for row in response.data], ['Bo', 'Bogotá', 'Bogotá Rural'])
+
+    def test_empty_query(self):
+        """
+        test empty query returns nothing
+        """
+        response = self.client.get(CITY_AUTOCOMPLETE_URL, {'q': ' '})
+        self.assertEqual(response.data, [])
+
+    def test_state_autocomplete(self):
+        """
+        test states autocomplete includes the country name
+        """
+        response = self.client.get(STATE_AUTOCOMPLETE_URL, {'q': 'bogota'})
+        self.assertEqual(response.data[0]['name'], 'Bogotá D.C.')
+        self.assertEqual(response.data[0]['country_name'], 'Colombia')
+
+    def test_search_list(self):
+        """
+        test ?search= filters the paginated list
+        """
+        response = self.client.get(CITY_URL, {'search': 'medellin'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['Medellín'])
+
+    def test_rename_refreshes_search_name(self):
+        """
+        test renamed city is searchable by the new name
+        """
+        city = models.City.objects.get(name='Medellín')
+        city.name = 'Envigado'
+        city.save()
+        response = self.client.get(CITY_AUTOCOMPLETE_URL, {'q': 'envi'})
+        self.assertEqual([row['id'] for row in response.data], [city.id])
@@ -0,0 +1,193 @@
+from unittest import mock
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from core import models
+from core.tests.utils import QueryBudgetMixin
+from location.mixins import LocationBulkMixin
+from location.tests.utils import sample_country, sample_state
+
+CITY_BULK_URL = reverse('location:city-bulk')
+STATE_BULK_URL = reverse('location:state-bulk')
+
+
+class PrivateLocationBulkApiTest(QueryBudgetMixin, TestCase):
+    """
+    test bulk create and update of location resources
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(email='test@test.com', name='test', password='test123')
+        self.client.force_authenticate(user=self.admin)
+
+    def test_bulk_create_cities(self):
+        """
+        test create many cities resolving states with one query
+        """
+        country = sample_country()
+        states = [sample_state(name='state %s' % code, code=code, country=country) for code in range(3)]
+        payload = [
+            {'name': 'city %s' % code, 'code': code, 'state': states[code % 3].id}
+            for code in range(30)
+        ]
+        # estados en un IN, savepoint, insert, release y la revision de la tabla
+        with self.assertMaxQueries(6):
+            response = self.client.post(CITY_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 30)
+        self.assertEqual(models.City.objects.count(), 30)
+
+    def test_bulk_create_reports_item_errors(self):
+        """
+        test invalid items are reported by index and nothing is written
+        """
+        state = sample_state()
+        payload = [
+            {'name': 'city', 'code': 1, 'state': state.id},
+            {'name': 'city', 'code': 2, 'state': 999},
+            {'name': '', 'code': 3, 'state': state.id},
+        ]
+        response = self.client.post(CITY_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertIn('state', response.data['errors'][0]['errors'])
+        self.assertFalse(models.City.objects.exists())
+
+    def test_bulk_update_states(self):
+        """
+        test patch many states in one request
+        """
+        country = sample_country()
+        first = models.State.objects.create(name='state 1', code=1, country=country)
+        second = models.State.objects.create(name='state 2', code=2, country=country)
+        payload = [
+            {'id': first.id, 'name': 'State One'},
+            {'id': second.id, 'code': 20},
+        ]
+        response = self.client.patch(STATE_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.name, 'State One')
+        self.assertEqual(first.search_name, 'state one')
+        self.assertEqual(second.code, 20)
+
+    def test_bulk_update_unchanged(self):
+        """
+        test rows patched with their current values are not written
+        """
+        country = sample_country()
+        first = models.State.objects.create(name='state 1', code=1, country=country)
+        second = models.State.objects.create(name='state 2', code=2, country=country)
+        version = models.Revision.objects.get(name='state').version
+        payload = [
+            {'id': first.id, 'name': 'state 1'},
+            {'id': second.id, 'code': 2},
+        ]
+        # estados, paises de la respuesta y ningun UPDATE
+        with self.assertMaxQueries(2):
+            response = self.client.patch(STATE_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(models.Revision.objects.get(name='state').version, version)
+
+    def test_bulk_update_unknown_id(self):
+        """
+        test patch with an unknown id is rejected
+        """
+        response = self.client.patch(STATE_BULK_URL, [{'id': 999, 'name': 'state'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 0)
+
+    def test_bulk_create_duplicated_in_payload(self):
+        """
+        test items repeating a unique key inside the payload are 400 by index
+        """
+        state = sample_state()
+        payload = [
+            {'name': 'city', 'code': 1, 'state': state.id},
+            {'name': 'other', 'code': 2, 'state': state.id},
+            {'name': 'repeated', 'code': 1, 'state': state.id},
+        ]
+        response = self.client.post(CITY_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [2])
+        self.assertFalse(models.City.objects.exists())
+
+    def test_bulk_create_existing_key(self):
+        """
+        test items using a key of an existing row are 400 with one query per key
+        """
+        state = sample_state()
+        models.City.objects.create(name='city', code=1, state=state)
+        payload = [{'name': 'city %s' % code, 'code': code, 'state': state.id} for code in range(1, 31)]
+        # estados en un IN y la consulta de llaves usadas
+        with self.assertMaxQueries(2):
+            response = self.client.post(CITY_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0])
+        self.assertEqual(models.City.objects.count(), 1)
+
+    def test_bulk_update_existing_key(self):
+        """
+        test patch to the code of another state is 400, keeping its own code is not
+        """
+        country = sample_country()
+        first = models.State.objects.create(name='state 1', code=1, country=country)
+        second = models.State.objects.create(name='state 2', code=2, country=country)
+        payload = [
+            {'id': first.id, 'code': 1, 'name': 'State One'},
+            {'id': second.id, 'code': 1},
+        ]
+        response = self.client.patch(STATE_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+
+    def test_bulk_create_concurrent_conflict(self):
+        """
+        test an IntegrityError from a row written after validation is a 400
+        """
+        state = sample_state()
+        payload = [{'name': 'city', 'code': 1, 'state': state.id}]
+        with mock.patch.object(LocationBulkMixin, 'get_bulk_unique_errors', return_value=[]):
+            models.City.objects.create(name='city', code=1, state=state)
+            response = self.client.post(CITY_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.data)
+        self.assertEqual(models.City.objects.count(), 1)
+
+    def test_bulk_requires_list(self):
+        """
+        test payload must be a list
+        """
+        response = self.client.post(CITY_BULK_URL, {'name': 'city'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PrivateLocationBulkApiTestNotAdmin(TestCase):
+    """
+    validate bulk urls if not admin user
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='user@user.com', name='user', password='test123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_forbidden(self):
+        """
+        test bulk create city if not admin
+        """
+        response = self.client.post(CITY_BULK_URL, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_partial_update_forbidden(self):
+        """
+        test patch city if not admin
+        """
+        state = sample_state()
+        city = models.City.objects.create(name='city', code=1, state=state)
+        response = self.client.patch(reverse('location:city-detail', args=[city.id]), {'name': 'edit'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
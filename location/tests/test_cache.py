@@ -0,0 +1,108 @@
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from core import models
+from core.tests.utils import QueryBudgetMixin
+from location import cache
+from location.tests.utils import sample_state, sample_city
+
+CITY_URL = reverse('location:city-list')
+CACHE_STATS_URL = reverse('location:cache-stats')
+
+
+class LocationCacheTest(QueryBudgetMixin, TestCase):
+    """
+    test read-through cache of location responses
+    """
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = APIClient()
+
+    def test_second_list_is_served_from_cache(self):
+        """
+        test repeated list only checks the table revisions
+        """
+        sample_city()
+        response = self.client.get(CITY_URL)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        with self.assertMaxQueries(1):
+            response = self.client.get(CITY_URL)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(cache.get_stats(), {'hits': 1, 'misses': 1})
+
+    def test_write_invalidates_list(self):
+        """
+        test create city is visible on the next list
+        """
+        city = sample_city()
+        self.client.get(CITY_URL)
+        models.City.objects.create(name='city two', code=2, state=city.state)
+
+        response = self.client.get(CITY_URL)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_parent_write_invalidates_nested_data(self):
+        """
+        test rename state is visible on retrieve city
+        """
+        city = sample_city()
+        url = reverse('location:city-detail', args=[city.id])
+        self.client.get(url)
+        state = city.state
+        state.name = 'state renamed'
+        state.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['state']['name'], 'state renamed')
+
+    def test_revision_from_another_process_invalidates_list(self):
+        """
+        test a revision bumped by another worker misses the cached body
+        """
+        city = sample_city()
+        self.client.get(CITY_URL)
+        models.City.objects.filter(pk=city.pk).update(name='city renamed')
+        models.Revision.objects.bump('city')
+
+        response = self.client.get(CITY_URL)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['name'], 'city renamed')
+
+    def test_delete_invalidates_retrieve(self):
+        """
+        test deleted city is not served from cache
+        """
+        city = sample_city()
+        url = reverse('location:city-detail', args=[city.id])
+        self.client.get(url)
+        city.delete()
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stats_requires_admin(self):
+        """
+        test cache stats are private
+        """
+        user = get_user_model().objects.create_user(email='user@user.com', name='user', password='test123')
+        self.client.force_authenticate(user=user)
+        response = self.client.get(CACHE_STATS_URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_stats_admin(self):
+        """
+        test cache stats for admin user
+        """
+        admin = get_user_model().objects.create_superuser(email='test@test.com', name='test', password='test123')
+        self.client.force_authenticate(user=admin)
+        sample_state()
+        self.client.get(reverse('location:state-list'))
+        response = self.client.get(CACHE_STATS_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'hits': 0, 'misses': 1})
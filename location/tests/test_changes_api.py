@@ -0,0 +1,136 @@
+import datetime
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from core import models
+from location.tests.utils import sample_city
+
+CHANGES_URL = reverse('location:changes')
+
+
+class LocationChangesApiTest(TestCase):
+    """
+    test delta sync of location reference data
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def age_rows(self):
+        """ move every row out of the sync margin """
+        old = timezone.now() - datetime.timedelta(hours=1)
+        for model in (models.Country, models.State, models.City):
+            model.objects.update(updated=old)
+        models.Tombstone.objects.update(deleted=old)
+
+    def test_full_sync_without_token(self):
+        """
+        test first sync returns every row and a token
+        """
+        city = sample_city()
+        response = self.client.get(CHANGES_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('token', response.data)
+        self.assertEqual([row['id'] for row in response.data['cities']['updated']], [city.id])
+        self.assertEqual(len(response.data['countries']['updated']), 1)
+        self.assertEqual(response.data['states']['deleted'], [])
+        self.assertIsNone(response.data['next'])
+
+    @override_settings(LOCATION_SYNC_PAGE_SIZE=2)
+    def test_full_sync_pages(self):
+        """
+        test first sync is paged by id and the token is taken before the first page
+        """
+        city = sample_city()
+        cities = [city] + [models.City.objects.create(name='city %s' % code, code=code, state=city.state) for code in (2, 3)]
+        response = self.client.get(CHANGES_URL)
+        self.assertIsNone(response.data['token'])
+        self.assertEqual(len(response.data['countries']['updated']) + len(response.data['states']['updated']), 2)
+        self.age_rows()
+        added = models.City.objects.create(name='city 4', code=4, state=city.state)
+
+        ids = []
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [row['id'] for row in response.data['cities']['updated']]
+        self.assertEqual(ids, [row.id for row in cities] + [added.id])
+
+        response = self.client.get(CHANGES_URL, {'since': response.data['token']})
+        self.assertEqual([row['id'] for row in response.data['cities']['updated']], [added.id])
+
+    def test_changes_since_token(self):
+        """
+        test sync with token returns only changed and deleted rows
+        """
+        city = sample_city()
+        other = models.City.objects.create(name='city two', code=2, state=city.state)
+        token = self.client.get(CHANGES_URL).data['token']
+        self.age_rows()
+
+        other.name = 'city renamed'
+        other.save()
+        deleted_id = city.id
+        city.delete()
+
+        response = self.client.get(CHANGES_URL, {'since': token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['name'] for row in response.data['cities']['updated']], ['city renamed'])
+        self.assertEqual(response.data['cities']['deleted'], [deleted_id])
+        self.assertEqual(response.data['countries']['updated'], [])
+        self.assertEqual(response.data['states']['updated'], [])
+
+    @override_settings(LOCATION_SYNC_PAGE_SIZE=2)
+    def test_changes_since_token_pages(self):
+        """
+        test delta sync is paged by id across updated and deleted rows
+        """
+        city = sample_city()
+        cities = [models.City.objects.create(name='city %s' % code, code=code, state=city.state) for code in range(2, 6)]
+        token = self.client.get(CHANGES_URL).data
+        while token['next']:
+            token = self.client.get(token['next']).data
+        self.age_rows()
+        for renamed in cities[:3]:
+            renamed.name = 'renamed'
+            renamed.save()
+        deleted = [cities[3].id, city.id]
+        cities[3].delete()
+        city.delete()
+
+        response = self.client.get(CHANGES_URL, {'since': token['token']})
+        self.assertIsNone(response.data['token'])
+        updated, removed = [], []
+        while True:
+            updated += [row['id'] for row in response.data['cities']['updated']]
+            removed += response.data['cities']['deleted']
+            self.assertLessEqual(len(response.data['cities']['updated']) + len(response.data['cities']['deleted']), 2)
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(updated, [row.id for row in cities[:3]])
+        self.assertEqual(removed, sorted(deleted))
+        self.assertIsNotNone(response.data['token'])
+
+    def test_cascade_delete_tombstones(self):
+        """
+        test deleting a country reports its states and cities
+        """
+        city = sample_city()
+        state = city.state
+        state.country.delete()
+
+        response = self.client.get(CHANGES_URL, {'since': self.client.get(CHANGES_URL).data['token']})
+        self.assertEqual(response.data['cities']['deleted'], [city.id])
+        self.assertEqual(response.data['states']['deleted'], [state.id])
+
+    def test_invalid_token(self):
+        """
+        test tampered token is rejected
+        """
+        response = self.client.get(CHANGES_URL, {'since': 'tampered'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(CHANGES_URL, {'cursor': 'tampered'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,3 +1,5 @@
+import json
+import unittest
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.test import TestCase
@@ -6,6 +8,7 @@ from django.contrib.auth import get_user_model
 from core import models
 from location.tests.utils import sample_state, sample_city
 from location.serializer import CitySerializer
+from core.renderers import msgpack
 
 CITY_URL = reverse('location:city-list')
 
@@ -35,7 +38,122 @@ class PublicCityApiTest(TestCase):
 
         response = self.client.get(CITY_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(serializer.data))
+        self.assertEqual(len(response.data['results']), len(serializer.data))
+
+    def test_city_list_nested_fields(self):
+        """
+        test nested state keeps the public fields, new model columns are not exposed
+        """
+        city = sample_city()
+        response = self.client.get(CITY_URL)
+        self.assertEqual(response.data['results'][0], {
+            'id': city.id, 'name': city.name, 'code': city.code,
+            'state': {'id': city.state.id, 'name': city.state.name, 'code': city.state.code, 'country': city.state.country_id},
+        })
+
+    def test_city_list_paginated_by_cursor(self):
+        """
+        test walk cities list with keyset cursors
+        """
+        state = sample_state()
+        for code in range(5):
+            models.City.objects.create(name='city %s' % code, code=code, state=state)
+
+        response = self.client.get(CITY_URL, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([city['code'] for city in response.data['results']], [0, 1])
+        self.assertIsNone(response.data['previous'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([city['code'] for city in response.data['results']], [2, 3])
+
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual([city['code'] for city in previous.data['results']], [0, 1])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([city['code'] for city in response.data['results']], [4])
+        self.assertIsNone(response.data['next'])
+
+    def test_city_list_ordered_by_name(self):
+        """
+        test cursor ordering by (name, id)
+        """
+        state = sample_state()
+        models.City.objects.create(name='b city', code=1, state=state)
+        models.City.objects.create(name='a city', code=2, state=state)
+        models.City.objects.create(name='a city', code=3, state=state)
+
+        response = self.client.get(CITY_URL, {'ordering': 'name', 'page_size': 2})
+        self.assertEqual([city['code'] for city in response.data['results']], [2, 3])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([city['code'] for city in response.data['results']], [1])
+
+    def test_city_list_invalid_cursor(self):
+        """
+        test tampered cursor is rejected
+        """
+        response = self.client.get(CITY_URL, {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_city_export_ndjson(self):
+        """
+        test stream cities as ndjson
+        """
+        state = sample_state()
+        for code in range(3):
+            models.City.objects.create(name='city %s' % code, code=code, state=state)
+
+        response = self.client.get(CITY_URL, {'format': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['code'] for row in rows], [0, 1, 2])
+        self.assertEqual(rows[0]['state']['name'], state.name)
+
+    def test_city_export_csv(self):
+        """
+        test stream cities as csv with flattened state
+        """
+        state = sample_state()
+        models.City.objects.create(name='city', code=1, state=state)
+
+        response = self.client.get(CITY_URL, {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines[0].split(',')[:5], ['id', 'name', 'code', 'state.id', 'state.name'])
+        self.assertEqual(len(lines), 2)
+
+    def test_city_columnar_paginated(self):
+        """
+        test columnar pages keep the cursor
+        """
+        state = sample_state()
+        for code in range(3):
+            models.City.objects.create(name='city %s' % code, code=code, state=state)
+
+        response = self.client.get(CITY_URL, {'format': 'columnar', 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.streaming)
+        data = json.loads(response.content)
+        self.assertEqual(data['columns'][:5], ['id', 'name', 'code', 'state.id', 'state.name'])
+        self.assertEqual([row[2] for row in data['rows']], [0, 1])
+
+        response = self.client.get(data['next'])
+        self.assertEqual([row[2] for row in json.loads(response.content)['rows']], [2])
+
+    @unittest.skipIf(msgpack is None, 'msgpack is not installed')
+    def test_city_msgpack_by_accept(self):
+        """
+        test msgpack page selected with the accept header
+        """
+        state = sample_state()
+        models.City.objects.create(name='city', code=1, state=state)
+
+        response = self.client.get(CITY_URL, {'fields': 'code,name'}, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(response.content)
+        self.assertEqual(data['results'], [{'code': 1, 'name': 'city'}])
 
     def test_retrieve_city(self):
         """
@@ -52,7 +170,7 @@ class PublicCityApiTest(TestCase):
         test retrieve city if not authenticated
         """
         state = sample_state()
-        city = sample_city(name='city test', code=2)
+        city = sample_city(name='city test', code=2, state=state)
         url = retrieve_city_url(city.id)
         payload = {
             'name': 'city edit',
@@ -88,12 +206,21 @@ class PrivateCityApiTest(TestCase):
         self.assertIn('name', response.data)
         self.assertEqual(response.data['name'], payload['name'])
 
+    def test_create_city_duplicated_code(self):
+        """
+        test create city with a code used in the state is a 400
+        """
+        city = sample_city()
+        response = self.client.post(CITY_URL, {'name': 'other', 'code': city.code, 'state': city.state_id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.data)
+
     def test_update_authorized(self):
         """
         test retrieve city if authenticated is admin
         """
         state = sample_state()
-        city = sample_city(name='city test', code=2)
+        city = sample_city(name='city test', code=2, state=state)
         url = retrieve_city_url(city.id)
         payload = {
             'name': 'city test',
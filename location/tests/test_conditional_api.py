@@ -0,0 +1,75 @@
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.test import TestCase
+from django.urls import reverse
+from core import models
+from core.tests.utils import QueryBudgetMixin
+from location.tests.utils import sample_country, sample_city
+
+COUNTRY_URL = reverse('location:country-list')
+CITY_URL = reverse('location:city-list')
+
+
+class ConditionalGetApiTest(QueryBudgetMixin, TestCase):
+    """
+    test ETag and Last-Modified on location endpoints
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_list_has_validators(self):
+        """
+        test list response carries ETag and Last-Modified
+        """
+        sample_country()
+        response = self.client.get(COUNTRY_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+    def test_if_none_match_not_modified(self):
+        """
+        test matching etag is answered without reading rows
+        """
+        sample_city()
+        etag = self.client.get(CITY_URL)['ETag']
+
+        with self.assertMaxQueries(1):
+            response = self.client.get(CITY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since_not_modified(self):
+        """
+        test last modified date is answered with 304
+        """
+        sample_country()
+        last_modified = self.client.get(COUNTRY_URL)['Last-Modified']
+        response = self.client.get(COUNTRY_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_write_changes_etag(self):
+        """
+        test etag changes after a write in a rendered table
+        """
+        city = sample_city()
+        etag = self.client.get(CITY_URL)['ETag']
+        state = city.state
+        state.name = 'state renamed'
+        state.save()
+
+        response = self.client.get(CITY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_query(self):
+        """
+        test different pages do not share the etag
+        """
+        country = sample_country()
+        models.Country.objects.create(name='country 2', code=2)
+        first = self.client.get(COUNTRY_URL, {'page_size': 1})
+        second = self.client.get(first.data['next'])
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        self.assertEqual(first.data['results'][0]['id'], country.id)
@@ -1,6 +1,8 @@
 from rest_framework.test import APIClient
 from rest_framework import status
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from core import models
 from location.serializer import CountrySerializer
@@ -33,7 +35,7 @@ class PublicCountryApiTest(TestCase):
 
         response = self.client.get(COUNTRY_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(serializer.data))
+        self.assertEqual(len(response.data['results']), len(serializer.data))
 
     def test_retrieve_country(self):
         """
@@ -98,6 +100,18 @@ class PrivateCountryApiTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_patch_unchanged(self):
+        """
+        test patch with the same values does not write nor bump the revision
+        """
+        country = models.Country.objects.create(name='country', code=1)
+        version = models.Revision.objects.get(name='country').version
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(retrieve_country_url(country.id), {'name': 'country'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('UPDATE')])
+        self.assertEqual(models.Revision.objects.get(name='country').version, version)
+
     def test_delete_authorized(self):
         """
         test delete country if authenticated is admin
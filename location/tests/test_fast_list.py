@@ -0,0 +1,89 @@
+from unittest import mock
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from core import models
+from core.fastlist import get_mapper
+from location import cache
+from location.serializer import CountrySerializer, StateListSerializer, CityListSerializer
+from register.serializer import CitizenListSerializer
+
+PARAMS = [
+    {},
+    {'fields': 'id,name'},
+    {'expand': ''},
+    {'expand': 'state.country'},
+    {'expand': 'country'},
+    {'fields': 'name,state.name,state.country', 'expand': 'state.country'},
+    {'ordering': 'name', 'page_size': 2},
+    {'search': 'me'},
+]
+
+
+class FastListParityTest(TestCase):
+    """
+    test lists built from values() render the same bytes as the serializers
+    """
+
+    def setUp(self):
+        # signing.dumps firma el cursor con la hora, se fija para comparar bytes
+        clock = mock.patch('django.core.signing.time.time', return_value=1700000000.0)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.client = APIClient()
+        country = models.Country.objects.create(name='Colombia', code=170)
+        models.Country.objects.create(name='Perú', code=604)
+        for state_code, state_name in enumerate(['Antioquia', 'Meta', 'Bogotá D.C.']):
+            state = models.State.objects.create(name=state_name, code=state_code, country=country)
+            for city_code, city_name in enumerate(['Medellín', 'Mesetas', 'Ñame "sur"']):
+                models.City.objects.create(name=city_name, code=city_code, state=state)
+
+    def get_content(self, url, params, fast):
+        cache.get_cache().clear()
+        with override_settings(FAST_LIST_SERIALIZATION=fast):
+            response = self.client.get(url, params, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_serializers_are_mapped(self):
+        """
+        test every list serializer has a compiled mapper
+        """
+        for serializer_class in (CountrySerializer, StateListSerializer, CityListSerializer, CitizenListSerializer):
+            self.assertIsNotNone(get_mapper(serializer_class))
+            self.assertIsNotNone(get_mapper(serializer_class, ('id', 'name'), ()))
+
+    def test_location_parity(self):
+        """
+        test countries, states and cities byte for byte
+        """
+        for name in ('location:country-list', 'location:state-list', 'location:city-list'):
+            for params in PARAMS:
+                with self.subTest(url=name, params=params):
+                    url = reverse(name)
+                    self.assertEqual(self.get_content(url, params, True), self.get_content(url, params, False))
+
+    def test_next_page_parity(self):
+        """
+        test cursor pages byte for byte
+        """
+        url = reverse('location:city-list')
+        first = self.client.get(url, {'ordering': 'name', 'page_size': 4}).data
+        self.assertEqual(self.get_content(first['next'], {}, True), self.get_content(first['next'], {}, False))
+
+    def test_citizen_parity(self):
+        """
+        test citizens byte for byte
+        """
+        user = get_user_model().objects.create_user(email='test@test.com', name='test', password='test123')
+        for index, city in enumerate(models.City.objects.all()[:3]):
+            models.Citizen.objects.create(
+                name='person', last_name=str(index), address='cll 30', phone=3213860504,
+                no_identification=9876543210 + index, city=city, user=user,
+            )
+        self.client.force_authenticate(user=user)
+        url = reverse('register:citizen-list')
+        for params in ({}, {'fields': 'id,phone'}, {'expand': 'city.state'}, {'expand': ''}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get_content(url, params, True), self.get_content(url, params, False))
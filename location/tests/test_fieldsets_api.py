@@ -0,0 +1,118 @@
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core import models
+from location import cache
+
+CITY_URL = reverse('location:city-list')
+STATE_URL = reverse('location:state-list')
+
+
+class FieldsetApiTest(TestCase):
+    """
+    test sparse fieldsets and opt-in expansion
+    """
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = APIClient()
+        self.country = models.Country.objects.create(name='Colombia', code=170)
+        self.state = models.State.objects.create(name='Antioquia', code=5, country=self.country)
+        self.city = models.City.objects.create(name='Medellin', code=1, state=self.state)
+
+    def get_city_query(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(CITY_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = [query['sql'] for query in queries.captured_queries if 'FROM "core_city"' in query['sql']]
+        return response.data['results'], sql[0]
+
+    def test_default_output_unchanged(self):
+        """
+        test without parameters the state is still nested
+        """
+        results, sql = self.get_city_query({})
+        self.assertEqual(results[0]['state']['name'], 'Antioquia')
+        self.assertEqual(results[0]['state']['country'], self.country.id)
+
+    def test_fields_trim_payload_and_columns(self):
+        """
+        test ?fields= selects only those columns without joins
+        """
+        results, sql = self.get_city_query({'fields': 'id,name'})
+        self.assertEqual(results, [{'id': self.city.id, 'name': 'Medellin'}])
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('"core_city"."code"', sql)
+
+    def test_expand_nested(self):
+        """
+        test ?expand=state.country joins and nests both parents
+        """
+        results, sql = self.get_city_query({'expand': 'state.country'})
+        self.assertEqual(results[0]['state']['country']['code'], 170)
+        self.assertIn('"core_country"', sql)
+
+    def test_expanded_country_invalidated_by_rename(self):
+        """
+        test cached cities with the expanded country miss after the country changes
+        """
+        params = {'expand': 'state,state.country'}
+        response = self.client.get(CITY_URL, params)
+        self.country.name = 'Colombia renamed'
+        self.country.save()
+
+        response = self.client.get(CITY_URL, params, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['state']['country']['name'], 'Colombia renamed')
+
+    def test_expand_none_returns_ids(self):
+        """
+        test empty ?expand= renders parents as primary keys
+        """
+        results, sql = self.get_city_query({'expand': ''})
+        self.assertEqual(results[0]['state'], self.state.id)
+        self.assertNotIn('JOIN', sql)
+
+    def test_fields_of_expanded(self):
+        """
+        test dotted ?fields= trims the expanded parent
+        """
+        results, sql = self.get_city_query({'fields': 'name,state.name', 'expand': 'state'})
+        self.assertEqual(results, [{'name': 'Medellin', 'state': {'name': 'Antioquia'}}])
+        self.assertNotIn('"core_state"."code"', sql)
+
+    def test_fields_of_default_nested(self):
+        """
+        test dotted ?fields= trims the nested state without ?expand=
+        """
+        results, sql = self.get_city_query({'fields': 'name,state.name'})
+        self.assertEqual(results, [{'name': 'Medellin', 'state': {'name': 'Antioquia'}}])
+        self.assertNotIn('"core_state"."code"', sql)
+
+    def test_fields_with_name_ordering(self):
+        """
+        test cursor column is loaded when not selected
+        """
+        models.City.objects.create(name='Bello', code=2, state=self.state)
+        response = self.client.get(CITY_URL, {'fields': 'code', 'ordering': 'name', 'page_size': 1})
+        self.assertEqual(response.data['results'], [{'code': 2}])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'code': 1}])
+
+    def test_retrieve_state_fields(self):
+        """
+        test ?fields= on retrieve
+        """
+        response = self.client.get(reverse('location:state-detail', args=[self.state.id]), {'fields': 'code'})
+        self.assertEqual(response.data, {'code': 5})
+
+    def test_expand_of_field_not_selected(self):
+        """
+        test ?expand= does not add fields left out by ?fields=
+        """
+        response = self.client.get(STATE_URL, {'fields': 'name', 'expand': 'country'})
+        self.assertEqual(response.data['results'], [{'name': 'Antioquia'}])
@@ -0,0 +1,122 @@
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from core import models
+from location.management.commands.import_locations import read_json_array
+
+
+class ImportLocationsCommandTest(TestCase):
+    """
+    test import_locations management command
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as target:
+            target.write(content)
+        return path
+
+    def import_files(self, **files):
+        out = StringIO()
+        call_command('import_locations', stdout=out, batch_size=2, **files)
+        return out.getvalue()
+
+    def test_import_hierarchy(self):
+        """
+        test import countries, states and cities resolving parents by code
+        """
+        countries = self.write('countries.csv', 'code,name\n170,Colombia\n')
+        states = self.write('states.jsonl', '{"code": 5, "name": "Antioquia", "country_code": 170}\n'
+                                            '{"code": 8, "name": "Atlantico", "country_code": 170}\n')
+        cities = self.write('cities.csv', 'code,name,state_code\n5001,Medellin,5\n5002,Abejorral,5\n8001,Barranquilla,8\n')
+
+        out = self.import_files(countries=countries, states=states, cities=cities, country=170)
+        self.assertIn('rows/s', out)
+        self.assertEqual(models.City.objects.count(), 3)
+        city = models.City.objects.select_related('state__country').get(code=8001)
+        self.assertEqual(city.state.name, 'Atlantico')
+        self.assertEqual(city.state.country.code, 170)
+
+    def test_import_is_idempotent(self):
+        """
+        test re-run updates names instead of duplicating codes
+        """
+        countries = self.write('countries.csv', 'code,name\n170,Colombia\n')
+        self.import_files(countries=countries)
+        countries = self.write('countries.csv', 'code,name\n170,Republica de Colombia\n218,Ecuador\n')
+        out = self.import_files(countries=countries)
+
+        self.assertIn('1 created, 1 updated', out)
+        self.assertEqual(models.Country.objects.count(), 2)
+        self.assertEqual(models.Country.objects.get(code=170).name, 'Republica de Colombia')
+
+    def test_states_default_country(self):
+        """
+        test --country is used for state rows without country_code
+        """
+        countries = self.write('countries.csv', 'code,name\n170,Colombia\n')
+        states = self.write('states.csv', 'code,name\n5,Antioquia\n')
+        self.import_files(countries=countries, states=states, country=170)
+        self.assertEqual(models.State.objects.get(code=5).country.code, 170)
+
+        with self.assertRaisesMessage(CommandError, 'line 2: state rows need a country_code column or the --country option'):
+            self.import_files(states=states)
+
+    def test_unknown_parent_is_skipped(self):
+        """
+        test rows whose parent code does not exist are reported
+        """
+        states = self.write('states.csv', 'code,name,country_code\n5,Antioquia,999\n')
+        out = self.import_files(states=states)
+        self.assertIn('1 skipped', out)
+        self.assertFalse(models.State.objects.exists())
+
+    def test_json_array_streamed(self):
+        """
+        test json array items are decoded across chunk boundaries with their line
+        """
+        content = '[\n  {"code": 1, "name": "Uno"},\n  {"code": 2, "name": "Dos \\u00f1"}\n]\n'
+        items = list(read_json_array(StringIO(content), chunk_size=7))
+        self.assertEqual(items, [(2, {'code': 1, 'name': 'Uno'}), (3, {'code': 2, 'name': 'Dos ñ'})])
+
+        countries = self.write('countries.json', content)
+        self.import_files(countries=countries)
+        self.assertEqual(models.Country.objects.get(code=2).name, 'Dos ñ')
+
+    def test_json_array_invalid(self):
+        """
+        test a broken json array reports the line
+        """
+        with self.assertRaisesMessage(CommandError, 'line 3'):
+            list(read_json_array(StringIO('[\n{"code": 1, "name": "Uno"}\n{"code": 2}]'), chunk_size=4))
+
+    def test_invalid_row_reports_line(self):
+        """
+        test a missing column or a non integer code is a CommandError with the line
+        """
+        countries = self.write('countries.csv', 'code,name\n170,Colombia\nabc,Peru\n')
+        with self.assertRaisesMessage(CommandError, 'line 3'):
+            self.import_files(countries=countries)
+        states = self.write('states.jsonl', '{"code": 5, "name": "Antioquia"}\n')
+        with self.assertRaisesMessage(CommandError, 'line 1'):
+            self.import_files(states=states)
+
+    def test_failed_batch_bumps_revision(self):
+        """
+        test batches committed before a failure still bump the revision
+        """
+        version = models.Revision.objects.filter(name='country').values_list('version', flat=True).first() or 0
+        countries = self.write('countries.csv', 'code,name\n170,Colombia\n218,Ecuador\nabc,Peru\n')
+        with self.assertRaises(CommandError):
+            self.import_files(countries=countries)
+        self.assertEqual(models.Country.objects.count(), 2)
+        self.assertGreater(models.Revision.objects.get(name='country').version, version)
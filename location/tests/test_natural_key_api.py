@@ -0,0 +1,60 @@
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+from core import models
+from core.tests.utils import QueryBudgetMixin
+
+
+class NaturalKeyApiTest(QueryBudgetMixin, TestCase):
+    """
+    test retrieve location resources by official codes
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.country = models.Country.objects.create(name='Colombia', code=170)
+        self.state = models.State.objects.create(name='Antioquia', code=5, country=self.country)
+        self.city = models.City.objects.create(name='Medellin', code=5001, state=self.state)
+
+    def test_retrieve_country_by_code(self):
+        """
+        test get country by code
+        """
+        response = self.client.get(reverse('location:country-by-code', args=[170]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.country.id)
+
+    def test_retrieve_state_by_code(self):
+        """
+        test get state by country and state code
+        """
+        response = self.client.get(reverse('location:state-by-code', args=[170, 5]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['country']['code'], 170)
+
+    def test_retrieve_city_by_code_one_query(self):
+        """
+        test get city by codes costs one query
+        """
+        with self.assertMaxQueries(1):
+            response = self.client.get(reverse('location:city-by-code', args=[170, 5, 5001]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.city.id)
+        self.assertEqual(response.data['state']['name'], 'Antioquia')
+
+    def test_city_code_of_other_state(self):
+        """
+        test city code under the wrong state is not found
+        """
+        models.State.objects.create(name='Atlantico', code=8, country=self.country)
+        response = self.client.get(reverse('location:city-by-code', args=[170, 8, 5001]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_duplicated_state_code(self):
+        """
+        test state code is unique inside the country
+        """
+        with self.assertRaises(IntegrityError):
+            models.State.objects.create(name='Other', code=5, country=self.country)
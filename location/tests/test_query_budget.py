@@ -0,0 +1,65 @@
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.test import TestCase
+from django.urls import reverse
+from core import models
+from core.tests.utils import QueryBudgetMixin
+from location.tests.utils import sample_country, sample_state
+
+COUNTRY_URL = reverse('location:country-list')
+STATE_URL = reverse('location:state-list')
+CITY_URL = reverse('location:city-list')
+
+
+class LocationQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    the number of queries of location endpoints does not grow with the rows
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_country_list_budget(self):
+        """
+        test list of countries costs the revision lookup and one query
+        """
+        models.Country.objects.bulk_create(
+            models.Country(name='country %s' % code, code=code) for code in range(100)
+        )
+        with self.assertMaxQueries(2):
+            response = self.client.get(COUNTRY_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_state_list_budget(self):
+        """
+        test list of states with nested country costs the revision lookup and one query
+        """
+        countries = [models.Country.objects.create(name='country %s' % code, code=code) for code in range(10)]
+        models.State.objects.bulk_create(
+            models.State(name='state %s' % code, code=code, country=countries[code % 10]) for code in range(100)
+        )
+        with self.assertMaxQueries(2):
+            response = self.client.get(STATE_URL)
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_city_list_budget(self):
+        """
+        test list of 1,000 cities with nested state costs at most two queries
+        """
+        country = sample_country()
+        states = [models.State.objects.create(name='state %s' % code, code=code, country=country) for code in range(50)]
+        models.City.objects.bulk_create(
+            models.City(name='city %s' % code, code=code, state=states[code % 50]) for code in range(1000)
+        )
+        with self.assertMaxQueries(2):
+            response = self.client.get(CITY_URL, {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 1000)
+
+    def test_city_retrieve_budget(self):
+        """
+        test retrieve city with nested state costs the revision lookup and one query
+        """
+        city = models.City.objects.create(name='city', code=1, state=sample_state())
+        with self.assertMaxQueries(2):
+            response = self.client.get(reverse('location:city-detail', args=[city.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
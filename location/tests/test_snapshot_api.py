@@ -0,0 +1,145 @@
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from core import models
+from location import cache, snapshots
+
+SNAPSHOT_URL = reverse('location:snapshot')
+
+
+def read_body(response):
+    return b''.join(response.streaming_content)
+
+
+class SnapshotApiTest(TestCase):
+    """
+    test precomputed snapshot of countries, states and cities
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root, LOCATION_SNAPSHOT_DEBOUNCE=None)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        country = models.Country.objects.create(name='Colombia', code=170)
+        state = models.State.objects.create(name='Antioquia', code=5, country=country)
+        models.City.objects.create(name='Medellin', code=1, state=state)
+
+    def test_snapshot_gzip(self):
+        """
+        test gzip variant with its length and encoding headers
+        """
+        response = self.client.get(SNAPSHOT_URL, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = read_body(response)
+        self.assertEqual(int(response['Content-Length']), len(body))
+        data = json.loads(gzip.decompress(body))
+        self.assertEqual([country['code'] for country in data['countries']], [170])
+        self.assertEqual(data['cities'][0]['name'], 'Medellin')
+
+    def test_snapshot_identity(self):
+        """
+        test plain json when the client does not accept compression
+        """
+        response = self.client.get(SNAPSHOT_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = json.loads(read_body(response))
+        self.assertEqual(data['states'][0]['name'], 'Antioquia')
+
+    @unittest.skipUnless(snapshots.brotli, 'brotli is not installed')
+    def test_snapshot_brotli(self):
+        """
+        test brotli variant is preferred when accepted
+        """
+        response = self.client.get(SNAPSHOT_URL, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        data = json.loads(snapshots.brotli.decompress(read_body(response)))
+        self.assertEqual(len(data['cities']), 1)
+
+    def test_snapshot_not_modified(self):
+        """
+        test etag of the snapshot version
+        """
+        response = self.client.get(SNAPSHOT_URL, HTTP_ACCEPT_ENCODING='gzip')
+        read_body(response)
+        response = self.client.get(SNAPSHOT_URL, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_snapshot_rebuilt_after_write(self):
+        """
+        test stale snapshot is rebuilt once the tables changed
+        """
+        first = self.client.get(SNAPSHOT_URL)
+        read_body(first)
+        models.Country.objects.create(name='Peru', code=604)
+
+        response = self.client.get(SNAPSHOT_URL)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        data = json.loads(read_body(response))
+        self.assertEqual([country['code'] for country in data['countries']], [170, 604])
+
+    def test_snapshot_stale_while_rebuilding(self):
+        """
+        test another request rebuilding keeps the previous file in service
+        """
+        first = self.client.get(SNAPSHOT_URL)
+        read_body(first)
+        models.Country.objects.create(name='Peru', code=604)
+        lock = cache.get_cache()
+        lock.add(snapshots.SNAPSHOT_LOCK_KEY, 1)
+        self.addCleanup(lock.delete, snapshots.SNAPSHOT_LOCK_KEY)
+
+        with mock.patch.object(snapshots, 'build_snapshot') as build:
+            response = self.client.get(SNAPSHOT_URL)
+        build.assert_not_called()
+        self.assertEqual(response['ETag'], first['ETag'])
+        data = json.loads(read_body(response))
+        self.assertEqual([country['code'] for country in data['countries']], [170])
+
+        lock.delete(snapshots.SNAPSHOT_LOCK_KEY)
+        response = self.client.get(SNAPSHOT_URL)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        read_body(response)
+        self.assertTrue(lock.add(snapshots.SNAPSHOT_LOCK_KEY, 1))
+
+    def test_snapshot_advisory_lock_on_postgres(self):
+        """
+        test postgres uses an advisory lock shared by every worker
+        """
+        connection = mock.MagicMock(vendor='postgresql')
+        cursor = connection.cursor.return_value.__enter__.return_value
+        patch_connections = mock.patch.object(snapshots, 'connections', {'default': connection})
+        lock = mock.call('SELECT pg_try_advisory_lock(%s)', [snapshots.SNAPSHOT_LOCK_ID])
+        unlock = mock.call('SELECT pg_advisory_unlock(%s)', [snapshots.SNAPSHOT_LOCK_ID])
+
+        cursor.fetchone.return_value = (False,)
+        with patch_connections, mock.patch.object(snapshots, 'build_snapshot') as build:
+            self.assertEqual(snapshots.rebuild_stale_snapshot('1-1-1'), '1-1-1')
+        build.assert_not_called()
+        self.assertEqual(cursor.execute.call_args_list, [lock])
+
+        cursor.fetchone.return_value = (True,)
+        cursor.execute.reset_mock()
+        with patch_connections, mock.patch.object(snapshots, 'build_snapshot', return_value='2-1-1'):
+            self.assertEqual(snapshots.rebuild_stale_snapshot('1-1-1'), '2-1-1')
+        self.assertEqual(cursor.execute.call_args_list, [lock, unlock])
+
+    def test_snapshot_read_only(self):
+        """
+        test snapshot does not accept writes
+        """
+        response = self.client.post(SNAPSHOT_URL)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
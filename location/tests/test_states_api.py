@@ -35,7 +35,16 @@ class PublicStateApiTest(TestCase):
 
         response = self.client.get(STATE_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(serializer.data))
+        self.assertEqual(len(response.data['results']), len(serializer.data))
+
+    def test_state_list_nested_fields(self):
+        """
+        test nested country keeps the public fields
+        """
+        country = sample_country()
+        models.State.objects.create(name='state one', code=1, country=country)
+        response = self.client.get(STATE_URL)
+        self.assertEqual(response.data['results'][0]['country'], {'id': country.id, 'name': country.name, 'code': country.code})
 
     def test_retrieve_state(self):
         """
@@ -88,6 +97,25 @@ class PrivateStateApiTest(TestCase):
         self.assertIn('name', response.data)
         self.assertEqual(response.data['name'], payload['name'])
 
+    def test_create_state_duplicated_code(self):
+        """
+        test create state with a code used in the country is a 400
+        """
+        country = sample_country()
+        models.State.objects.create(name='state', code=1, country=country)
+        response = self.client.post(STATE_URL, {'name': 'other', 'code': 1, 'country': country.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', response.data)
+
+    def test_partial_update_keeps_code(self):
+        """
+        test patch only the name of a state is not its own duplicate
+        """
+        country = sample_country()
+        state = models.State.objects.create(name='state', code=1, country=country)
+        response = self.client.patch(retrieve_state_url(state.id), {'name': 'edit'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_update_authorized(self):
         """
         test retrieve state if authenticated is admin
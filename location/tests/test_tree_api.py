@@ -0,0 +1,85 @@
+import gzip
+import json
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from core import models
+from core.tests.utils import QueryBudgetMixin
+from location import cache
+
+
+def tree_url(id_country):
+    return reverse('location:country-tree', args=[id_country])
+
+
+class CountryTreeApiTest(QueryBudgetMixin, TestCase):
+    """
+    test nested tree of a country
+    """
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = APIClient()
+        self.country = models.Country.objects.create(name='Colombia', code=170)
+        for state_code in range(3):
+            state = models.State.objects.create(name='state %s' % state_code, code=state_code, country=self.country)
+            for city_code in range(4):
+                models.City.objects.create(name='city %s' % city_code, code=city_code, state=state)
+
+    def test_tree_constant_queries(self):
+        """
+        test tree of any size costs the revision lookup and two queries
+        """
+        with self.assertMaxQueries(3):
+            response = self.client.get(tree_url(self.country.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['states']), 3)
+        self.assertEqual(len(response.data['states'][0]['cities']), 4)
+        self.assertEqual(response.data['code'], 170)
+
+    def test_tree_country_without_states(self):
+        """
+        test country without states has an empty tree
+        """
+        country = models.Country.objects.create(name='empty', code=1)
+        response = self.client.get(tree_url(country.id))
+        self.assertEqual(response.data['states'], [])
+
+    def test_tree_not_found(self):
+        """
+        test tree of a missing country
+        """
+        response = self.client.get(tree_url(999))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(LOCATION_TREE_SNAPSHOT_MIN_CITIES=10)
+    def test_tree_snapshot_served_compressed(self):
+        """
+        test big tree is stored compressed and served with only the revision lookup
+        """
+        expected = self.client.get(tree_url(self.country.id)).data
+
+        with self.assertMaxQueries(1):
+            response = self.client.get(tree_url(self.country.id), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(json.loads(gzip.decompress(response.content)), json.loads(json.dumps(expected)))
+
+        response = self.client.get(tree_url(self.country.id))
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(json.loads(response.content)['name'], 'Colombia')
+
+    @override_settings(LOCATION_TREE_SNAPSHOT_MIN_CITIES=10)
+    def test_tree_snapshot_invalidated_by_write(self):
+        """
+        test snapshot is rebuilt after a city changes
+        """
+        self.client.get(tree_url(self.country.id))
+        city = models.City.objects.filter(state__country=self.country).first()
+        city.name = 'renamed'
+        city.save()
+
+        response = self.client.get(tree_url(self.country.id))
+        names = [city['name'] for state in response.data['states'] for city in state['cities']]
+        self.assertIn('renamed', names)
@@ -6,13 +6,13 @@ def sample_country(name='country 1', code=1):
     return country
 
 
-def sample_state(name='state 1', code=1):
-    country = sample_country()
+def sample_state(name='state 1', code=1, country=None):
+    country = country or sample_country()
     state = models.State.objects.create(name=name, code=code, country=country)
     return state
 
 
-def sample_city(name='city', code=1):
-    state = sample_state()
+def sample_city(name='city', code=1, state=None):
+    state = state or sample_state()
     city = models.City.objects.create(name=name, code=code, state=state)
     return city
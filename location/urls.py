@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from location.views import CountryListViewSet, StateViewSet, CityViewSet
+from location.views import (
+    CountryListViewSet, StateViewSet, CityViewSet, LocationChangesView, CacheStatsView,
+    CountryByCodeView, StateByCodeView, CityByCodeView, snapshot,
+)
 
 router = DefaultRouter()
 router.register('countries', CountryListViewSet, basename='country')
@@ -10,5 +13,19 @@ router.register('cities', CityViewSet, basename='city')
 app_name = 'location'
 
 urlpatterns = [
-    path('', include(router.urls))
+    path('', include(router.urls)),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('changes/', LocationChangesView.as_view(), name='changes'),
+    path('snapshot/', snapshot, name='snapshot'),
+    path('countries/by-code/<int:country_code>/', CountryByCodeView.as_view(), name='country-by-code'),
+    path(
+        'countries/by-code/<int:country_code>/states/<int:state_code>/',
+        StateByCodeView.as_view(),
+        name='state-by-code'
+    ),
+    path(
+        'countries/by-code/<int:country_code>/states/<int:state_code>/cities/<int:city_code>/',
+        CityByCodeView.as_view(),
+        name='city-by-code'
+    ),
 ]
@@ -1,21 +1,47 @@
-from django.shortcuts import render
+from django.http import FileResponse
+from django.shortcuts import render, get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+from rest_framework.generics import RetrieveAPIView
 from rest_framework.viewsets import ReadOnlyModelViewSet, mixins, GenericViewSet, ModelViewSet
 from rest_framework.permissions import IsAdminUser, AllowAny, IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 from core.models import Country, State, City
-from location.serializer import CountrySerializer, StateSerializer, StateListSerializer, CitySerializer, CityListSerializer
-
-
-class CountryListViewSet(ModelViewSet):
+from core.fastlist import FastListMixin
+from core.fieldsets import FieldsetMixin
+from core.pagination import KeysetPagination
+from core.renderers import COMPACT_RENDERER_CLASSES
+from core.streaming import StreamingExportMixin
+from location import cache, snapshots, sync
+from location.mixins import ConditionalGetMixin, CachedResponseMixin, LocationBulkMixin, AutocompleteMixin
+from location.serializer import (
+    CountrySerializer, StateSerializer, StateListSerializer, CitySerializer, CityListSerializer, CountryTreeSerializer,
+)
+from user.authentication import get_authentication_classes
+
+WRITE_ACTIONS = ('create', 'update', 'partial_update', 'destroy', 'bulk')
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class CountryListViewSet(FieldsetMixin, ConditionalGetMixin, CachedResponseMixin, LocationBulkMixin, FastListMixin, ModelViewSet):
     """
     view set from list and retrieve countries
     """
     queryset = Country.objects.all()
     serializer_class = CountrySerializer
+    pagination_class = KeysetPagination
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + COMPACT_RENDERER_CLASSES
+    model_dependencies = ('country',)
 
     def get_permissions(self):
         """"""
-        if self.action == 'update' or self.action == 'create' or self.action == 'destroy':
+        if self.action in WRITE_ACTIONS:
             permission_classes = [IsAuthenticated, IsAdminUser]
         else:
             permission_classes = [AllowAny]
@@ -23,21 +49,41 @@ class CountryListViewSet(ModelViewSet):
         return [permission() for permission in permission_classes]
 
     def get_authenticators(self):
-        if self.request.method == "PUT" or self.request.method == 'POST' or self.request.method == 'DELETE':
-            self.authentication_classes = [TokenAuthentication]
+        if self.request.method in WRITE_METHODS:
+            self.authentication_classes = get_authentication_classes()
         return [auth() for auth in self.authentication_classes]
 
+    @action(detail=True)
+    def tree(self, request, pk=None, format=None):
+        """ country with its states and their cities in two queries after the revision lookup """
+        key = snapshots.get_tree_snapshot_key(pk) if request.accepted_renderer.format == 'json' else None
+        content = snapshots.get_tree_snapshot(key) if key else None
+        if content is not None:
+            return snapshots.tree_snapshot_response(request, content)
+
+        country = snapshots.get_country_tree(pk)
+        data = CountryTreeSerializer(country).data
+        if key and snapshots.should_snapshot_tree(country):
+            snapshots.store_tree_snapshot(key, data)
+        return Response(data)
+
 
-class StateViewSet(ModelViewSet):
+class StateViewSet(
+    FieldsetMixin, ConditionalGetMixin, CachedResponseMixin, LocationBulkMixin, AutocompleteMixin, FastListMixin, ModelViewSet,
+):
     """
     view set from list and retrieve states
     """
     queryset = State.objects.all()
     serializer_class = StateSerializer
+    pagination_class = KeysetPagination
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + COMPACT_RENDERER_CLASSES
+    model_dependencies = ('state', 'country')
+    autocomplete_values = {'country_name': 'country__name'}
 
     def get_permissions(self):
         """"""
-        if self.action == 'update' or self.action == 'create' or self.action == 'destroy':
+        if self.action in WRITE_ACTIONS:
             self.permission_classes = [IsAuthenticated, IsAdminUser]
         else:
             self.permission_classes = [AllowAny]
@@ -45,8 +91,8 @@ class StateViewSet(ModelViewSet):
         return [permission() for permission in self.permission_classes]
 
     def get_authenticators(self):
-        if self.request.method == "PUT" or self.request.method == 'POST' or self.request.method == 'DELETE':
-            self.authentication_classes = [TokenAuthentication]
+        if self.request.method in WRITE_METHODS:
+            self.authentication_classes = get_authentication_classes()
         return [auth() for auth in self.authentication_classes]
 
     def get_serializer_class(self):
@@ -55,16 +101,22 @@ class StateViewSet(ModelViewSet):
         return self.serializer_class
 
 
-class CityViewSet(ModelViewSet):
+class CityViewSet(
+    FieldsetMixin, StreamingExportMixin, ConditionalGetMixin, CachedResponseMixin, LocationBulkMixin, AutocompleteMixin,
+    FastListMixin, ModelViewSet,
+):
     """
     view set from list and retrieve cities
     """
     queryset = City.objects.all()
     serializer_class = CitySerializer
+    pagination_class = KeysetPagination
+    model_dependencies = ('city', 'state', 'country')
+    autocomplete_values = {'state_name': 'state__name', 'country_name': 'state__country__name'}
 
     def get_permissions(self):
         """"""
-        if self.action == 'update' or self.action == 'create' or self.action == 'destroy':
+        if self.action in WRITE_ACTIONS:
             self.permission_classes = [IsAuthenticated, IsAdminUser]
         else:
             self.permission_classes = [AllowAny]
@@ -72,11 +124,103 @@ class CityViewSet(ModelViewSet):
         return [permission() for permission in self.permission_classes]
 
     def get_authenticators(self):
-        if self.request.method == "PUT" or self.request.method == 'POST' or self.request.method == 'DELETE':
-            self.authentication_classes = [TokenAuthentication]
+        if self.request.method in WRITE_METHODS:
+            self.authentication_classes = get_authentication_classes()
         return [auth() for auth in self.authentication_classes]
 
     def get_serializer_class(self):
         if self.action == 'list' or self.action == 'retrieve':
             return CityListSerializer
         return self.serializer_class
+
+
+class CacheStatsView(APIView):
+    """ hits and misses of the location response cache """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get_authenticators(self):
+        return [auth() for auth in get_authentication_classes()]
+
+    def get(self, request, format=None):
+        return Response(cache.get_stats())
+
+
+class LocationChangesView(APIView):
+    """
+    delta sync of location reference data, ?since=<token> returns only the
+    rows inserted, updated or deleted after the token was issued, without it
+    every row. Both are pages linked by next, the last one has the token
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, format=None):
+        cursor = request.query_params.get('cursor')
+        since = request.query_params.get('since')
+        if cursor:
+            try:
+                cursor = sync.read_cursor(cursor)
+            except ValueError:
+                raise ValidationError({'cursor': ['Invalid sync cursor']})
+        elif since:
+            try:
+                since = sync.read_token(since)
+            except ValueError:
+                raise ValidationError({'since': ['Invalid sync token']})
+        page = sync.get_changes(since or None, cursor or None)
+        encoded = page.pop('cursor')
+        page['next'] = replace_query_param(request.build_absolute_uri(), 'cursor', encoded) if encoded else None
+        return Response(page)
+
+
+class CountryByCodeView(RetrieveAPIView):
+    """ retrieve country by its official code """
+    serializer_class = CountrySerializer
+    permission_classes = [AllowAny]
+
+    def get_object(self):
+        return get_object_or_404(Country, code=self.kwargs['country_code'])
+
+
+class StateByCodeView(RetrieveAPIView):
+    """ retrieve state by the codes of its country and its own, one indexed query """
+    serializer_class = StateListSerializer
+    permission_classes = [AllowAny]
+
+    def get_object(self):
+        return get_object_or_404(
+            State.objects.select_related('country'),
+            country__code=self.kwargs['country_code'],
+            code=self.kwargs['state_code'],
+        )
+
+
+class CityByCodeView(RetrieveAPIView):
+    """ retrieve city by the codes of its country, state and its own, one indexed query """
+    serializer_class = CityListSerializer
+    permission_classes = [AllowAny]
+
+    def get_object(self):
+        return get_object_or_404(
+            City.objects.select_related('state'),
+            state__country__code=self.kwargs['country_code'],
+            state__code=self.kwargs['state_code'],
+            code=self.kwargs['city_code'],
+        )
+
+
+@require_safe
+def snapshot(request):
+    """
+    every country, state and city from the precomputed files, the variant
+    is chosen by Accept-Encoding and neither the ORM nor DRF render anything
+    """
+    path, encoding, version = snapshots.get_snapshot_file(request)
+    etag = quote_etag('%s-%s' % (version, encoding or 'identity'))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = FileResponse(open(path, 'rb'), content_type='application/json')
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Vary'] = 'Accept-Encoding'
+    return response
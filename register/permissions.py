@@ -2,7 +2,10 @@ from rest_framework import permissions
 
 
 class CitizensOwnerUser(permissions.BasePermission):
-    """ permission validated if citizen register belong to user authenticated """
+    """
+    permission validated if citizen register belong to user authenticated,
+    get_queryset already filters by user so this only guards other querysets
+    """
 
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user
+        return obj.user_id == request.user.id
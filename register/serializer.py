@@ -1,9 +1,15 @@
 from rest_framework import serializers
 from core.models import Citizen
+from core.bulk import BulkPrimaryKeyRelatedField
+from core.fieldsets import DynamicFieldsMixin
+from core.serializers import UpdateChangedMixin
+from location.serializer import CitySerializer
 
 
-class CitizenSerializer(serializers.ModelSerializer):
+class CitizenSerializer(UpdateChangedMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """ Model serializer from city model """
+    serializer_related_field = BulkPrimaryKeyRelatedField
+    expandable_fields = {'city': CitySerializer}
 
     def validate_phone(self, value):
         if len(str(value)) > 10:
@@ -22,5 +28,5 @@ class CitizenSerializer(serializers.ModelSerializer):
 
 
 class CitizenListSerializer(CitizenSerializer):
-    class Meta(CitizenSerializer.Meta):
-        depth = 1
+    """ city nested with the fields of CitySerializer """
+    city = CitySerializer(read_only=True)
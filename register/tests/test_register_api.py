@@ -1,13 +1,18 @@
+import json
+import unittest
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from core import models
+from core.renderers import msgpack
+from core.tests.utils import QueryBudgetMixin
 from location.tests.utils import sample_city
 from register.serializer import CitizenListSerializer
 
 REGISTER_URL = reverse('register:citizen-list')
+BULK_URL = reverse('register:citizen-bulk')
 
 
 def detail_url(id_citizen):
@@ -39,7 +44,7 @@ class PublicRegisterApiTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateRegisterApiTest(TestCase):
+class PrivateRegisterApiTest(QueryBudgetMixin, TestCase):
     """ tests api by access private """
 
     def setUp(self):
@@ -77,6 +82,127 @@ class PrivateRegisterApiTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_list_nested_fields(self):
+        """ test nested city keeps the public fields """
+        city = sample_city('city 1', code=1)
+        sample_register(user=self.user, city=city)
+        response = self.client.get(REGISTER_URL)
+        self.assertEqual(response.data[0]['city'], {'id': city.id, 'name': city.name, 'code': city.code, 'state': city.state_id})
+
+    def test_list_query_budget(self):
+        """ test list citizens with nested city costs one query """
+        city = sample_city('city 1', code=1)
+        models.Citizen.objects.bulk_create(
+            models.Citizen(
+                name='person', last_name=str(index), address='cll 30', phone=3213860504,
+                no_identification=index, city=city, user=self.user
+            )
+            for index in range(200)
+        )
+        with self.assertMaxQueries(1):
+            response = self.client.get(REGISTER_URL)
+        self.assertEqual(len(response.data), 200)
+
+    def test_list_sparse_fields(self):
+        """ test ?fields= and ?expand= trim citizens and their city """
+        city = sample_city('city 1', code=1)
+        sample_register(user=self.user, city=city, name='test', last_name='one')
+
+        with self.assertMaxQueries(1):
+            response = self.client.get(REGISTER_URL, {'fields': 'id,last_name,city'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'last_name', 'city'})
+        self.assertEqual(response.data[0]['city']['name'], city.name)
+
+        response = self.client.get(REGISTER_URL, {'fields': 'last_name,city.name,city.state', 'expand': 'city.state'})
+        self.assertEqual(response.data[0]['city']['state']['id'], city.state_id)
+        self.assertEqual(set(response.data[0]['city']), {'name', 'state'})
+
+        response = self.client.get(REGISTER_URL, {'expand': ''})
+        self.assertEqual(response.data[0]['city'], city.id)
+
+    def test_export_ndjson_by_user(self):
+        """ test stream only the citizens of the user as ndjson """
+        city = sample_city('city 1', code=1)
+        sample_register(user=self.user, city=city, name='test', last_name='one')
+        user1 = get_user_model().objects.create_user(email='person@person.com', name='person 1', password='test123')
+        sample_register(user=user1, city=city, name='test', last_name='two')
+
+        response = self.client.get(REGISTER_URL, {'format': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn(b'"last_name":"one"', lines[0])
+
+    def test_export_columnar_streamed(self):
+        """ test citizens list has no pagination so columnar is streamed """
+        city = sample_city('city 1', code=1)
+        sample_register(user=self.user, city=city, name='test', last_name='one')
+        sample_register(user=self.user, city=city, name='test', last_name='two')
+
+        response = self.client.get(REGISTER_URL, {'format': 'columnar', 'expand': ''})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['columns'], ['id', 'name', 'last_name', 'address', 'phone', 'no_identification', 'city'])
+        self.assertEqual([row[2] for row in data['rows']], ['one', 'two'])
+
+    @unittest.skipIf(msgpack is None, 'msgpack is not installed')
+    def test_export_msgpack_streamed(self):
+        """ test citizens streamed as a sequence of msgpack objects """
+        city = sample_city('city 1', code=1)
+        sample_register(user=self.user, city=city, name='test', last_name='one')
+
+        response = self.client.get(REGISTER_URL, {'format': 'msgpack'})
+        self.assertTrue(response.streaming)
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(b''.join(response.streaming_content))
+        rows = list(unpacker)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['city']['name'], city.name)
+
+    def test_bulk_create(self):
+        """ test register many people in one request """
+        city = sample_city('city 1', code=1)
+        payload = [
+            {
+                'name': 'people', 'last_name': str(index), 'address': 'cll 30',
+                'phone': '3213860504', 'no_identification': str(index), 'city': city.id
+            }
+            for index in range(20)
+        ]
+        # ciudades en un IN, savepoint, insert y release
+        with self.assertMaxQueries(4):
+            response = self.client.post(BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(models.Citizen.objects.filter(user=self.user).count(), 20)
+
+    def test_bulk_create_item_errors(self):
+        """ test bulk register reports errors by item """
+        city = sample_city('city 1', code=1)
+        payload = [
+            {
+                'name': 'people', 'last_name': 'one', 'address': 'cll 30',
+                'phone': '32138605041', 'no_identification': '1', 'city': city.id
+            },
+        ]
+        response = self.client.post(BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('phone', response.data['errors'][0]['errors'])
+
+    def test_bulk_update_only_own_citizens(self):
+        """ test bulk update can not touch citizens of other users """
+        city = sample_city('city 1', code=1)
+        user = get_user_model().objects.create_user(email='person@person.com', name='person 1', password='test123')
+        own = sample_register(user=self.user, city=city, last_name='one')
+        other = sample_register(user=user, city=city, last_name='two')
+        payload = [{'id': own.id, 'address': 'cll 40'}, {'id': other.id, 'address': 'cll 40'}]
+        response = self.client.patch(BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        other.refresh_from_db()
+        self.assertEqual(other.address, 'cll 30')
+
     # def test_retrieve_citizen(self):
     #     """ test retrieve citizen by id """
     #     city = sample_city('city one', code=1)
@@ -94,7 +220,22 @@ class PrivateRegisterApiTest(TestCase):
         citizen = sample_register(user=user, city=city, name='person', last_name='one')
         url = detail_url(citizen.id)
         response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_citizen_one_query(self):
+        """ test retrieve is one query filtered by the user and a foreign id does not load the row """
+        city = sample_city('city one', code=1)
+        citizen = sample_register(user=self.user, city=city)
+        with self.assertMaxQueries(1) as context:
+            response = self.client.get(detail_url(citizen.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('"user_id" = %s' % self.user.id, context.captured_queries[0]['sql'])
+
+        user = get_user_model().objects.create_user(email='person@person.com', name='person 1', password='test123')
+        foreign = sample_register(user=user, city=city)
+        with self.assertMaxQueries(1):
+            response = self.client.get(detail_url(foreign.id))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_update_citizen(self):
         """ test update citizen by id """
@@ -124,7 +265,7 @@ class PrivateRegisterApiTest(TestCase):
             'last_name': 'edit'
         }
         response = self.client.get(url, payload)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_delete_citizen(self):
         """ test delete citizen by id """
@@ -141,4 +282,4 @@ class PrivateRegisterApiTest(TestCase):
         citizen = sample_register(user=user, city=city, name='person', last_name='one')
         url = detail_url(citizen.id)
         response = self.client.delete(url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
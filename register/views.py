@@ -1,20 +1,33 @@
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
+from core.bulk import BulkModelMixin
+from core.fastlist import FastListMixin
+from core.fieldsets import FieldsetMixin
+from core.streaming import StreamingExportMixin
 from register.serializer import CitizenSerializer, CitizenListSerializer
 from core.models import Citizen
 from register.permissions import CitizensOwnerUser
+from user.authentication import get_authentication_classes
 
 
-class CitizenModelViewSet(ModelViewSet):
+class CitizenModelViewSet(FieldsetMixin, StreamingExportMixin, BulkModelMixin, FastListMixin, ModelViewSet):
     """ model view set citizen model """
     permission_classes = [IsAuthenticated, CitizensOwnerUser]
-    authentication_classes = [TokenAuthentication]
     serializer_class = CitizenSerializer
+    # el permiso de objeto compara el usuario aunque no se pida en ?fields=
+    fieldset_columns = ('user',)
+
+    def get_authenticators(self):
+        """ token or jwt, with jwt request.user is a TokenUser so only its id is used """
+        return [auth() for auth in get_authentication_classes()]
 
     def perform_create(self, serializer):
         """ save user auth """
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
+
+    def get_bulk_save_kwargs(self):
+        """ bulk created citizens belong to the user authenticated """
+        return {'user_id': self.request.user.id}
 
     def get_serializer_class(self):
         if self.action == 'list' or self.action == 'retrieve':
@@ -22,6 +35,8 @@ class CitizenModelViewSet(ModelViewSet):
         return self.serializer_class
 
     def get_queryset(self):
-        if self.action == 'list':
-            return Citizen.objects.filter(user=self.request.user)
-        return Citizen.objects.all()
+        """
+        only the citizens of the user authenticated in every action, a detail
+        is one query on the (user, id) index and a foreign id is a 404
+        """
+        return Citizen.objects.filter(user_id=self.request.user.id)
@@ -0,0 +1,177 @@
+import copy
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework_simplejwt.authentication import JWTTokenUserAuthentication
+
+
+class LRUCache:
+    """ cache en memoria del proceso con tamaño maximo y tiempo de vida """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            self.data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+_local_cache = None
+_local_cache_lock = threading.Lock()
+
+
+def get_local_cache():
+    global _local_cache
+    with _local_cache_lock:
+        if _local_cache is None:
+            _local_cache = LRUCache(
+                getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10000),
+                getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 300),
+            )
+        return _local_cache
+
+
+def get_shared_cache():
+    """ cache compartido entre procesos, None si TOKEN_AUTH_CACHE_ALIAS no esta configurado """
+    alias = getattr(settings, 'TOKEN_AUTH_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def get_local_ttl(shared):
+    """
+    sin cache compartido la invalidacion no llega a los otros procesos, la
+    entrada local vive solo TOKEN_AUTH_LOCAL_TTL segundos
+    """
+    if shared is None:
+        return getattr(settings, 'TOKEN_AUTH_LOCAL_TTL', 5)
+    return getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 300)
+
+
+def get_shared_key(key):
+    # la llave del token no se guarda en claro en el cache compartido
+    return 'auth:token:%s' % hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def get_generation_key(user_id):
+    return 'auth:user:%s:generation' % user_id
+
+
+def get_generation(shared, user_id):
+    """ version del usuario en el cache compartido, cambia al invalidarlo """
+    return shared.get(get_generation_key(user_id))
+
+
+def get_token(key):
+    """
+    token del cache, con cache compartido cada entrada guarda la generacion
+    del usuario y se descarta si otro proceso la cambio
+    """
+    shared = get_shared_cache()
+    item = get_local_cache().get(key)
+    if shared is None:
+        return item[1] if item is not None else None
+
+    local = item is not None
+    if item is None:
+        item = shared.get(get_shared_key(key))
+        if item is None:
+            return None
+    generation, token = item
+    if get_generation(shared, token.user_id) != generation:
+        get_local_cache().delete(key)
+        return None
+    if not local:
+        get_local_cache().set(key, item, get_local_ttl(shared))
+    return token
+
+
+def set_token(token):
+    shared = get_shared_cache()
+    generation = get_generation(shared, token.user_id) if shared is not None else None
+    get_local_cache().set(token.key, (generation, token), get_local_ttl(shared))
+    if shared is not None:
+        shared.set(get_shared_key(token.key), (generation, token), getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 300))
+
+
+def invalidate_token(key):
+    """ borra el token de los dos caches, en otros procesos lo descarta invalidate_user """
+    get_local_cache().delete(key)
+    shared = get_shared_cache()
+    if shared is not None:
+        shared.delete(get_shared_key(key))
+
+
+def invalidate_user(user_id):
+    """
+    nueva generacion del usuario en el cache compartido, los otros procesos
+    descartan sus entradas en la siguiente peticion. Sin cache compartido
+    expiran con TOKEN_AUTH_CACHE_TTL
+    """
+    shared = get_shared_cache()
+    if shared is not None:
+        # dura mas que las entradas que la comparan
+        shared.set(get_generation_key(user_id), uuid.uuid4().hex, 2 * getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 300))
+
+
+def clear():
+    get_local_cache().clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication con un cache token -> usuario, en memoria (LRU con
+    tiempo de vida) y opcionalmente en el cache compartido. user.signals lo
+    invalida al borrar el token o guardar el usuario
+    """
+
+    def authenticate_credentials(self, key):
+        token = get_token(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            set_token(token)
+        # copia para que la peticion no modifique el objeto compartido del cache
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return token.user, token
+
+
+def get_authentication_classes():
+    """
+    token de base de datos y, con JWT_AUTH_ENABLED, access tokens jwt
+    verificados por firma sin consultar la base (request.user es un TokenUser)
+    """
+    classes = [CachedTokenAuthentication]
+    if getattr(settings, 'JWT_AUTH_ENABLED', True):
+        classes.append(JWTTokenUserAuthentication)
+    return classes
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
+from user import hashing
+
+
+class EmailBackend(ModelBackend):
+    """
+    ModelBackend por email que calcula el hash en user.hashing, la consulta
+    y el guardado quedan en el hilo de la peticion. get_by_natural_key busca
+    el correo sin distinguir mayusculas en el indice unico de LOWER(email)
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # mismo tiempo que con un usuario existente (#20760 de django)
+            hashing.run(make_password, password)
+            return None
+
+        correct, encoded = hashing.run(hashing.verify_password, password, user.password)
+        if encoded:
+            user.password = encoded
+            user.save(update_fields=['password'])
+        if correct and self.user_can_authenticate(user):
+            return user
+        return None
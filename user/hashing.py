@@ -0,0 +1,70 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashPoolFull(APIException):
+    """ todos los hilos de hash y la cola estan ocupados, el handler de DRF agrega Retry-After """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, try again later.'
+    default_code = 'hash_pool_full'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+class HashPool:
+    """
+    hilos dedicados a calcular hashes de contraseñas, pbkdf2 y argon2 liberan
+    el GIL asi que corren en paralelo. Con workers + queue hashes pendientes
+    se rechaza en lugar de bloquear el hilo de la peticion
+    """
+
+    def __init__(self, workers, queue):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self.slots = threading.BoundedSemaphore(workers + queue)
+
+    def run(self, function, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashPoolFull(getattr(settings, 'LOGIN_HASH_RETRY_AFTER', 1))
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda future: self.slots.release())
+        return future.result()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """ pool del proceso, None si LOGIN_HASH_WORKERS es None (hash en el hilo de la peticion) """
+    global _pool
+    workers = getattr(settings, 'LOGIN_HASH_WORKERS', 4)
+    if workers is None:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashPool(workers, getattr(settings, 'LOGIN_HASH_QUEUE', 16))
+        return _pool
+
+
+def run(function, *args):
+    pool = get_pool()
+    if pool is None:
+        return function(*args)
+    return pool.run(function, *args)
+
+
+def verify_password(password, encoded):
+    """ (correcta, nuevo hash si el hasher cambio o se deben actualizar las iteraciones) """
+    updated = []
+    correct = check_password(password, encoded, setter=lambda raw_password: updated.append(make_password(raw_password)))
+    return correct, updated[0] if updated else None
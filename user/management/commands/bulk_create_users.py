@@ -0,0 +1,45 @@
+import csv
+import json
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from user.provisioning import UserProvisioner, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users from a csv with email,name,password columns ("-" reads stdin), '
+        'hashing passwords on every core and inserting them in bulk_create batches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=None, help='hash processes, one per cpu by default')
+        parser.add_argument('--tokens', metavar='PATH', default=None, help='issue auth tokens and write email,token to this csv')
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+        provisioner = UserProvisioner(options['batch_size'], options['workers'], tokens=bool(options['tokens']))
+        try:
+            if options['path'] == '-':
+                result = provisioner.run(read_rows(sys.stdin))
+            else:
+                with open(options['path'], newline='', encoding=options['encoding']) as stream:
+                    result = provisioner.run(read_rows(stream))
+        except (OSError, ValueError) as exc:
+            # ValueError: faltan columnas o el archivo no esta en --encoding
+            raise CommandError(exc)
+
+        if options['tokens']:
+            with open(options['tokens'], 'w', newline='') as stream:
+                writer = csv.writer(stream)
+                writer.writerow(('email', 'token'))
+                writer.writerows((token['email'], token['token']) for token in result['tokens'])
+
+        for failure in result['failed']:
+            self.stderr.write('line %d %s: %s' % (failure['line'], failure['email'], json.dumps(failure['errors'])))
+        self.stdout.write('%d rows, %d created, %d failed in %.2fs (%.1f rows/s)' % (
+            result['rows'], result['created'], len(result['failed']), result['elapsed'], result['rows_per_second'],
+        ))
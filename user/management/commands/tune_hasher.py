@@ -0,0 +1,59 @@
+import math
+import os
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hashers
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.crypto import get_random_string
+from core.benchmark import measure
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the configured password hashers on this machine and recommend '
+        'PASSWORD_HASH_ITERATIONS and LOGIN_HASH_WORKERS for a target login latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=250, help='hash time per login')
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--sample-iterations', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        if options['target_ms'] <= 0:
+            raise CommandError('--target-ms must be positive')
+        target = options['target_ms'] / 1000
+        password = get_random_string(16)
+        salt = get_random_string(22)
+
+        self.stdout.write('hashers (current parameters):')
+        for hasher in get_hashers():
+            try:
+                elapsed = measure(lambda: hasher.encode(password, hasher.salt()), options['repeat'])
+            except (ValueError, ImportError) as exc:
+                self.stdout.write('  %s: not available (%s)' % (hasher.algorithm, exc))
+                continue
+            self.stdout.write('  %s: %.1fms' % (hasher.algorithm, elapsed * 1000))
+
+        # pbkdf2 escala lineal con las iteraciones
+        sample = options['sample_iterations']
+        per_iteration = measure(lambda: PBKDF2PasswordHasher().encode(password, salt, sample), options['repeat']) / sample
+        iterations = max(1000, int(round(target / per_iteration, -3)))
+        workers = os.cpu_count() or 1
+        current = getattr(settings, 'PASSWORD_HASH_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+        self.stdout.write('pbkdf2_sha256: %.3fus per iteration' % (per_iteration * 1e6))
+        self.stdout.write('recommended settings for %.0fms per login:' % options['target_ms'])
+        self.stdout.write('  PASSWORD_HASH_ITERATIONS = %d  # now %d, %.0fms' % (
+            iterations, current, current * per_iteration * 1000,
+        ))
+        self.stdout.write('  LOGIN_HASH_WORKERS = %d  # one per cpu, about %d logins/s' % (
+            workers, math.floor(workers / (iterations * per_iteration)),
+        ))
+        self.stdout.write('  LOGIN_HASH_QUEUE = %d  # logins waiting at most about %.1fs' % (
+            workers * 4, 4 * iterations * per_iteration,
+        ))
+        if iterations < PBKDF2PasswordHasher.iterations:
+            self.stdout.write(self.style.WARNING(
+                'fewer iterations than the django default (%d), prefer more workers or a higher target'
+                % PBKDF2PasswordHasher.iterations
+            ))
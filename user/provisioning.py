@@ -0,0 +1,194 @@
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+from rest_framework.authtoken.models import Token
+from core.models import Counter
+from user.signals import USER_COUNTER
+
+COLUMNS = ('email', 'name', 'password')
+PASSWORD_MIN_LENGTH = 5
+EMAIL_MAX_LENGTH = 255
+NAME_MAX_LENGTH = 100
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def init_worker():
+    """ con spawn el proceso hijo no hereda django configurado, con fork no hace nada """
+    import django
+    django.setup()
+
+
+def get_api_workers():
+    return getattr(settings, 'PROVISIONING_API_WORKERS', 2)
+
+
+def get_pool():
+    """
+    pool de procesos compartido por las peticiones del api, se crea una sola
+    vez con PROVISIONING_API_WORKERS procesos en lugar de uno por nucleo en
+    cada peticion
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=get_api_workers(), initializer=init_worker)
+        return _pool
+
+
+def discard_pool():
+    """ un proceso del pool murio (BrokenProcessPool), la siguiente peticion crea otro """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+
+def read_rows(stream):
+    """ (numero de linea, fila) de un csv con columnas email,name,password """
+    reader = csv.DictReader(stream)
+    missing = [column for column in COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError('Missing csv columns: %s.' % ', '.join(missing))
+    for row in reader:
+        yield reader.line_num, row
+
+
+def validate_row(row):
+    """ errores de una fila, las mismas reglas de UserSerializer """
+    errors = {}
+    try:
+        validate_email(row.get('email') or '')
+    except ValidationError as exc:
+        errors['email'] = list(exc.messages)
+    if len(row.get('email') or '') > EMAIL_MAX_LENGTH:
+        errors['email'] = ['Ensure this field has no more than %d characters.' % EMAIL_MAX_LENGTH]
+    name = (row.get('name') or '').strip()
+    if not name:
+        errors['name'] = ['This field is required.']
+    elif len(name) > NAME_MAX_LENGTH:
+        errors['name'] = ['Ensure this field has no more than %d characters.' % NAME_MAX_LENGTH]
+    if len(row.get('password') or '') < PASSWORD_MIN_LENGTH:
+        errors['password'] = ['Ensure this field has at least %d characters.' % PASSWORD_MIN_LENGTH]
+    return errors
+
+
+class UserProvisioner:
+    """
+    crea usuarios desde filas de un csv en lotes de bulk_create, los hashes de
+    las contraseñas se calculan en un pool de procesos (uno por nucleo, o el
+    pool compartido que recibe en pool sin cerrarlo al terminar). Las filas
+    invalidas o con correo repetido se reportan y se omiten. bulk_create
+    no envia post_save, el contador de usuarios se ajusta por lote
+    """
+
+    def __init__(self, batch_size=1000, workers=None, tokens=False, pool=None):
+        self.batch_size = batch_size
+        self.pool = pool
+        self.workers = workers or os.cpu_count() or 1
+        self.tokens = tokens
+        self.model = get_user_model()
+        self.seen = set()
+
+    def run(self, rows):
+        started = time.monotonic()
+        result = {'rows': 0, 'created': 0, 'failed': [], 'tokens': []}
+        if self.pool is not None:
+            self.create_batches(self.pool, rows, result)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker) as pool:
+                self.create_batches(pool, rows, result)
+
+        result['failed'].sort(key=lambda failure: failure['line'])
+        elapsed = time.monotonic() - started
+        result['elapsed'] = round(elapsed, 3)
+        result['rows_per_second'] = round(result['rows'] / elapsed if elapsed else result['rows'], 1)
+        if not self.tokens:
+            del result['tokens']
+        return result
+
+    def create_batches(self, pool, rows, result):
+        rows = iter(rows)
+        batch = list(islice(rows, self.batch_size))
+        while batch:
+            result['rows'] += len(batch)
+            self.create_batch(pool, batch, result)
+            batch = list(islice(rows, self.batch_size))
+
+    def create_batch(self, pool, batch, result):
+        valid = []
+        for line, row in batch:
+            errors = validate_row(row)
+            email = self.model.objects.normalize_email((row.get('email') or '').strip())
+            if not errors and email.lower() in self.seen:
+                errors['email'] = ['Duplicated in the file.']
+            if errors:
+                result['failed'].append({'line': line, 'email': email, 'errors': errors})
+                continue
+            self.seen.add(email.lower())
+            valid.append((line, email, row))
+
+        # sin distinguir mayusculas, como el indice unico sobre LOWER(email)
+        existing = set(
+            self.model.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=[email.lower() for line, email, row in valid])
+            .values_list('email_lower', flat=True)
+        )
+        pending = []
+        for line, email, row in valid:
+            if email.lower() in existing:
+                result['failed'].append({'line': line, 'email': email, 'errors': {'email': ['user with this email already exists.']}})
+            else:
+                pending.append((line, email, row))
+        if not pending:
+            return
+
+        chunksize = max(1, len(pending) // (self.workers * 4))
+        passwords = pool.map(make_password, [row['password'] for line, email, row in pending], chunksize=chunksize)
+        users = [
+            self.model(email=email, name=row['name'].strip(), password=password)
+            for (line, email, row), password in zip(pending, passwords)
+        ]
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(users)
+                created = users
+        except IntegrityError:
+            # otro proceso creo alguno de los correos, se insertan uno a uno para reportarlos
+            created = self.create_one_by_one(pending, users, result)
+
+        if created:
+            Counter.objects.add(USER_COUNTER, len(created))
+            result['created'] += len(created)
+            if self.tokens:
+                result['tokens'] += self.create_tokens(created)
+
+    def create_one_by_one(self, pending, users, result):
+        created = []
+        for (line, email, row), user in zip(pending, users):
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create([user])
+                created.append(user)
+            except IntegrityError:
+                result['failed'].append({'line': line, 'email': email, 'errors': {'email': ['user with this email already exists.']}})
+        return created
+
+    def create_tokens(self, users):
+        """ un token por usuario creado en un solo insert, sqlite no devuelve los ids de bulk_create """
+        ids = dict(self.model.objects.filter(email__in=[user.email for user in users]).values_list('email', 'id'))
+        tokens = [Token(key=Token.generate_key(), user_id=ids[user.email]) for user in users]
+        Token.objects.bulk_create(tokens)
+        return [{'email': user.email, 'token': token.key} for user, token in zip(users, tokens)]
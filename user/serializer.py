@@ -1,9 +1,12 @@
-from rest_framework import serializers
+from rest_framework import serializers, exceptions
 from django.contrib.auth import get_user_model, authenticate
 from django.utils.translation import ugettext_lazy as _
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from core.serializers import UpdateChangedMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(UpdateChangedMixin, serializers.ModelSerializer):
     """ serializer from user model """
 
     class Meta:
@@ -13,9 +16,21 @@ class UserSerializer(serializers.ModelSerializer):
             'password': {
                 'write_only': True,
                 'min_length': 5
+            },
+            # la unicidad se valida sin distinguir mayusculas en validate_email
+            'email': {
+                'validators': []
             }
         }
 
+    def validate_email(self, value):
+        users = get_user_model().objects.filter_email(value)
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+        if users.exists():
+            raise serializers.ValidationError(_('user with this email already exists.'), code='unique')
+        return value
+
     def create(self, validated_data):
         user = get_user_model().objects.create_user(
             name=validated_data['name'],
@@ -27,11 +42,10 @@ class UserSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         password = validated_data.pop('password', None)
-        user = super(UserSerializer, self).update(instance, validated_data)
         if password:
             instance.set_password(password)
-            instance.save()
-        return user
+        # un solo UPDATE con los campos modificados, incluida la contraseña
+        return super(UserSerializer, self).update(instance, validated_data)
 
 
 class TokenSerializer(serializers.Serializer):
@@ -56,3 +70,42 @@ class TokenSerializer(serializers.Serializer):
             raise serializers.ValidationError(msg, code='authorization')
         attrs['user'] = user
         return attrs
+
+
+def set_user_claims(token, user):
+    """ permisos del usuario en el jwt para no consultarlo al autenticar """
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    return token
+
+
+class JWTTokenSerializer(TokenObtainPairSerializer):
+    """ par access/refresh con los permisos del usuario """
+
+    @classmethod
+    def get_token(cls, user):
+        return set_user_claims(super().get_token(user), user)
+
+
+class JWTRefreshSerializer(TokenRefreshSerializer):
+    """
+    refresh que vuelve a leer el usuario: inactivo o borrado no renueva y los
+    permisos del access salen de la fila actual. El refresh rotado se emite
+    con for_user para quedar como OutstandingToken del usuario y poder
+    revocarlo (user.signals)
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = get_user_model().objects.filter(
+            **{jwt_settings.USER_ID_FIELD: refresh[jwt_settings.USER_ID_CLAIM]}
+        ).first()
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User is inactive or deleted'), code='user_inactive')
+
+        if not jwt_settings.ROTATE_REFRESH_TOKENS:
+            return {'access': str(set_user_claims(refresh.access_token, user))}
+        if jwt_settings.BLACKLIST_AFTER_ROTATION:
+            refresh.blacklist()
+        refresh = JWTTokenSerializer.get_token(user)
+        return {'access': str(refresh.access_token), 'refresh': str(refresh)}
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from core.models import Counter
+from user import authentication
+
+USER_COUNTER = 'user'
+JWT_SECURITY_FIELDS = ('is_active', 'is_staff', 'is_superuser')
+
+
+def user_created(sender, instance, created, raw=False, **kwargs):
+    """ suma el usuario creado al contador """
+    if created and not raw:
+        Counter.objects.add(USER_COUNTER, 1)
+
+
+def user_deleted(sender, instance, **kwargs):
+    """ resta el usuario eliminado del contador """
+    Counter.objects.add(USER_COUNTER, -1)
+
+
+def user_changed(sender, instance, created, **kwargs):
+    """ el usuario en cache puede estar desactivado o tener otra contraseña """
+    if not created:
+        for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+            authentication.invalidate_token(key)
+        authentication.invalidate_user(instance.pk)
+        # otra vez al confirmar, un proceso pudo leer la fila anterior mientras tanto
+        transaction.on_commit(lambda: authentication.invalidate_user(instance.pk))
+
+
+def get_security_changed(instance, update_fields):
+    """ se desactivo, cambio la contraseña o los permisos de staff del usuario guardado """
+    # set_password deja _password hasta despues de post_save, el rehash del login no lo usa
+    if getattr(instance, '_password', None) is not None:
+        return True
+    if update_fields is not None and not set(update_fields) & set(JWT_SECURITY_FIELDS):
+        return False
+    changed = instance.get_changed_fields()
+    # sin los valores leidos de la base no se sabe que cambio
+    return changed is None or bool(set(changed) & set(JWT_SECURITY_FIELDS))
+
+
+def user_security_changed(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """
+    revoca los refresh jwt del usuario, los access ya emitidos llevan los
+    permisos anteriores hasta que expiran (ACCESS_TOKEN_LIFETIME)
+    """
+    if created or raw or not get_security_changed(instance, update_fields):
+        return
+    tokens = OutstandingToken.objects.filter(user_id=instance.pk, blacklistedtoken__isnull=True, expires_at__gt=timezone.now())
+    BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in tokens], ignore_conflicts=True)
+
+
+def token_deleted(sender, instance, **kwargs):
+    authentication.invalidate_token(instance.key)
+    authentication.invalidate_user(instance.user_id)
+
+
+post_save.connect(user_created, sender=get_user_model(), dispatch_uid='user_counter_created')
+post_delete.connect(user_deleted, sender=get_user_model(), dispatch_uid='user_counter_deleted')
+post_save.connect(user_changed, sender=get_user_model(), dispatch_uid='user_token_cache_changed')
+post_save.connect(user_security_changed, sender=get_user_model(), dispatch_uid='user_jwt_revoked')
+post_delete.connect(token_deleted, sender=Token, dispatch_uid='user_token_cache_deleted')
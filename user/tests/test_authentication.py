@@ -0,0 +1,144 @@
+import time
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from user import authentication
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    """ pruebas del cache de autenticacion por token """
+
+    def setUp(self):
+        authentication.clear()
+        self.addCleanup(authentication.clear)
+        self.user = get_user_model().objects.create_user(email='test@test.com', password='test123', name='test')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % self.token.key)
+
+    def get_me(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(ME_URL)
+        return response, len(queries)
+
+    def test_cached_without_queries(self):
+        ''' segunda peticion sin consultas '''
+        response, queries = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, 1)
+
+        response, queries = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], 'test@test.com')
+        self.assertEqual(queries, 0)
+
+    def test_token_deleted(self):
+        ''' token borrado deja de autenticar '''
+        self.get_me()
+        self.token.delete()
+        response, queries = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_deactivated(self):
+        ''' usuario desactivado deja de autenticar '''
+        self.get_me()
+        self.user.is_active = False
+        self.user.save()
+        response, queries = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_changed(self):
+        ''' cambio de contraseña por el serializer invalida el cache '''
+        self.get_me()
+        response = self.client.patch(ME_URL, {'password': 'newpassword'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response, queries = self.get_me()
+        self.assertEqual(queries, 1)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('newpassword'))
+
+    def test_cached_user_is_a_copy(self):
+        ''' la peticion no modifica el usuario del cache '''
+        self.get_me()
+        self.client.patch(ME_URL, {'name': 'changed'})
+        response, queries = self.get_me()
+        self.assertEqual(response.data['name'], 'changed')
+
+    def test_update_stale_cached_user(self):
+        ''' el PATCH compara contra la fila actual y no contra el usuario del cache '''
+        self.get_me()
+        get_user_model().objects.filter(pk=self.user.pk).update(name='changed elsewhere')
+        response = self.client.patch(ME_URL, {'name': 'test'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'test')
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_cache(self):
+        ''' con cache compartido otro proceso no consulta la base '''
+        self.get_me()
+        authentication.clear()
+        response, queries = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, 0)
+
+        self.token.delete()
+        authentication.clear()
+        response, queries = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_cache_invalidated_by_other_process(self):
+        ''' la generacion del usuario en el cache compartido descarta la entrada local '''
+        self.get_me()
+        # otro proceso desactiva al usuario, su signal solo limpia su propio cache local
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        authentication.invalidate_user(self.user.pk)
+        response, queries = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_cache_local_hit(self):
+        ''' sin invalidar la entrada local sigue sirviendo sin consultas '''
+        self.get_me()
+        response, queries = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, 0)
+
+    def test_local_cache_short_ttl(self):
+        ''' sin cache compartido la entrada local expira en TOKEN_AUTH_LOCAL_TTL '''
+        self.get_me()
+        # otro proceso desactiva al usuario, este no recibe la signal
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        now = time.monotonic()
+        with mock.patch.object(authentication.time, 'monotonic', return_value=now + 3):
+            response, queries = self.get_me()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with mock.patch.object(authentication.time, 'monotonic', return_value=now + 6):
+            response, queries = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_lru_bounded(self):
+        ''' el cache en memoria descarta los menos usados '''
+        cache = authentication.LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_lru_expired(self):
+        ''' entradas vencidas no se devuelven '''
+        cache = authentication.LRUCache(maxsize=2, ttl=-1)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
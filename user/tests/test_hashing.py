@@ -0,0 +1,80 @@
+import io
+import threading
+from django.contrib.auth import authenticate, get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from user import hashing
+
+TOKEN_URL = reverse('user:token')
+
+
+class HashPoolTest(TestCase):
+    """ pruebas del login con el pool de hashes """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='test@test.com', password='test123', name='test')
+
+    def test_login(self):
+        ''' token con el hash en el pool '''
+        response = self.client.post(TOKEN_URL, {'email': 'test@test.com', 'password': 'test123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('token', response.data)
+
+    def test_pool_full(self):
+        ''' pool lleno responde 503 con Retry-After '''
+        pool = hashing.HashPool(workers=1, queue=0)
+        started, release = threading.Event(), threading.Event()
+
+        def busy():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=pool.run, args=(busy,))
+        worker.start()
+        started.wait(5)
+        original, hashing._pool = hashing._pool, pool
+        try:
+            response = self.client.post(TOKEN_URL, {'email': 'test@test.com', 'password': 'test123'})
+        finally:
+            hashing._pool = original
+            release.set()
+            worker.join()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+        self.assertEqual(pool.run(lambda: 'free'), 'free')
+
+    @override_settings(LOGIN_HASH_WORKERS=None)
+    def test_without_pool(self):
+        ''' sin LOGIN_HASH_WORKERS el hash corre en el hilo de la peticion '''
+        self.assertEqual(authenticate(email='test@test.com', password='test123'), self.user)
+        self.assertIsNone(authenticate(email='test@test.com', password='wrong'))
+        self.assertIsNone(authenticate(email='nobody@test.com', password='test123'))
+
+    def test_rehash_iterations(self):
+        ''' las iteraciones nuevas se aplican al iniciar sesion '''
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            get_user_model().objects.create_user(email='old@test.com', password='test123', name='old')
+        user = get_user_model().objects.get(email='old@test.com')
+        self.assertIn('$1000$', user.password)
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertEqual(authenticate(email='old@test.com', password='test123'), user)
+        user.refresh_from_db()
+        self.assertIn('$2000$', user.password)
+
+    def test_inactive(self):
+        ''' usuario inactivo no inicia sesion '''
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(authenticate(email='test@test.com', password='test123'))
+
+    def test_tune_hasher(self):
+        ''' recomendacion de iteraciones '''
+        out = io.StringIO()
+        call_command('tune_hasher', target_ms=50, repeat=1, sample_iterations=1000, stdout=out)
+        self.assertIn('PASSWORD_HASH_ITERATIONS = ', out.getvalue())
+        self.assertIn('LOGIN_HASH_WORKERS = ', out.getvalue())
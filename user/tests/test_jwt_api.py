@@ -0,0 +1,178 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core import models
+from location.tests.utils import sample_city
+
+JWT_URL = reverse('user:jwt')
+JWT_REFRESH_URL = reverse('user:jwt-refresh')
+JWT_REVOKE_URL = reverse('user:jwt-revoke')
+REGISTER_URL = reverse('register:citizen-list')
+COUNTRY_URL = reverse('location:country-list')
+ADMIN_URLS = (reverse('location:cache-stats'), reverse('user:user-bulk'))
+
+
+class JWTApiTest(TestCase):
+    """ pruebas de autenticacion jwt """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='test@test.com', password='test123', name='test')
+
+    def get_pair(self, email='test@test.com', password='test123'):
+        response = self.client.post(JWT_URL, {'email': email, 'password': password})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_obtain_wrong_password(self):
+        ''' credenciales incorrectas '''
+        response = self.client.post(JWT_URL, {'email': 'test@test.com', 'password': 'wrong'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_citizens_without_auth_queries(self):
+        ''' listado de ciudadanos con jwt solo consulta los ciudadanos '''
+        city = sample_city()
+        models.Citizen.objects.create(
+            name='person', last_name='one', address='cll 30', phone=3213860504,
+            no_identification=1, city=city, user=self.user,
+        )
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer %s' % self.get_pair()['access'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(REGISTER_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(queries), 1)
+
+    def test_create_citizen_with_jwt(self):
+        ''' ciudadano creado con jwt pertenece al usuario del token '''
+        city = sample_city()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer %s' % self.get_pair()['access'])
+        response = self.client.post(REGISTER_URL, {
+            'name': 'people', 'last_name': 'test', 'address': 'cll 30',
+            'phone': '3213860504', 'no_identification': '1234567890', 'city': city.id,
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(models.Citizen.objects.get().user, self.user)
+
+    def test_admin_claim(self):
+        ''' escritura de location con jwt de un administrador '''
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer %s' % self.get_pair()['access'])
+        response = self.client.post(COUNTRY_URL, {'name': 'Colombia', 'code': 170})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        get_user_model().objects.create_superuser(email='admin@test.com', password='admin123', name='admin')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer %s' % self.get_pair('admin@test.com', 'admin123')['access'])
+        response = self.client.post(COUNTRY_URL, {'name': 'Colombia', 'code': 170})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_refresh_rotated(self):
+        ''' refresh rotado no se puede volver a usar '''
+        pair = self.get_pair()
+        response = self.client.post(JWT_REFRESH_URL, {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+        self.assertNotEqual(response.data['refresh'], pair['refresh'])
+
+        response = self.client.post(JWT_REFRESH_URL, {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_deactivated(self):
+        ''' usuario desactivado no renueva con un refresh anterior '''
+        pair = self.get_pair()
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(JWT_REFRESH_URL, {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_inactive_not_revoked(self):
+        ''' desactivado con update() no pasa por signals, el refresh lee la fila '''
+        pair = self.get_pair()
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.post(JWT_REFRESH_URL, {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_claims_from_row(self):
+        ''' staff retirado sin signals, el access renovado no lleva los permisos '''
+        admin = get_user_model().objects.create_superuser(email='admin@test.com', password='admin123', name='admin')
+        pair = self.get_pair('admin@test.com', 'admin123')
+        get_user_model().objects.filter(pk=admin.pk).update(is_staff=False, is_superuser=False)
+        response = self.client.post(JWT_REFRESH_URL, {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer %s' % response.data['access'])
+        response = self.client.post(COUNTRY_URL, {'name': 'Colombia', 'code': 170})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_staff_removed_revokes(self):
+        ''' quitar staff revoca los refresh, tambien los rotados '''
+        admin = get_user_model().objects.create_superuser(email='admin@test.com', password='admin123', name='admin')
+        pair = self.get_pair('admin@test.com', 'admin123')
+        rotated = self.client.post(JWT_REFRESH_URL, {'refresh': pair['refresh']}).data
+        admin.is_staff = False
+        admin.is_superuser = False
+        admin.save()
+        response = self.client.post(JWT_REFRESH_URL, {'refresh': rotated['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_changed_revokes(self):
+        ''' cambio de contraseña revoca los refresh '''
+        pair = self.get_pair()
+        response = self.client.post(JWT_REFRESH_URL, {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.set_password('newpassword')
+        user.save()
+        response = self.client.post(JWT_REFRESH_URL, {'refresh': response.data['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rehash_keeps_tokens(self):
+        ''' el rehash de la contraseña al iniciar sesion no revoca '''
+        pair = self.get_pair()
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.get_pair()
+        self.assertIn('$2000$', get_user_model().objects.get(pk=self.user.pk).password)
+        response = self.client.post(JWT_REFRESH_URL, {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_name_change_keeps_tokens(self):
+        ''' otros cambios no revocan '''
+        pair = self.get_pair()
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.name = 'other'
+        user.save()
+        response = self.client.post(JWT_REFRESH_URL, {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_revoke(self):
+        ''' refresh revocado queda en la lista negra '''
+        pair = self.get_pair()
+        response = self.client.post(JWT_REVOKE_URL, {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(JWT_REFRESH_URL, {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_signature(self):
+        ''' token alterado no autentica '''
+        access = self.get_pair()['access']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer %sx' % access)
+        response = self.client.get(REGISTER_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_AUTH_ENABLED=False)
+    def test_disabled(self):
+        ''' sin JWT_AUTH_ENABLED solo se acepta el token de base de datos '''
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer %s' % self.get_pair()['access'])
+        response = self.client.get(REGISTER_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_admin_views_read_setting_per_request(self):
+        ''' las vistas de administracion leen JWT_AUTH_ENABLED en cada peticion '''
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer %s' % self.get_pair()['access'])
+        for url in ADMIN_URLS:
+            with override_settings(JWT_AUTH_ENABLED=False):
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,141 @@
+import csv
+import io
+import os
+import tempfile
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.models import Counter
+from user import provisioning
+from user.provisioning import UserProvisioner, read_rows
+
+BULK_URL = reverse('user:user-bulk')
+
+CSV = (
+    'email,name,password\n'
+    'uno@test.com,uno,password1\n'
+    'dos@test.com,dos,password2\n'
+    'existe@test.com,existe,password3\n'
+    'uno@test.com,repetido,password4\n'
+    'malo,malo,password5\n'
+    'corta@test.com,corta,pw\n'
+)
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class ProvisioningTest(TestCase):
+    """ creacion masiva de usuarios """
+
+    def setUp(self):
+        get_user_model().objects.create_user(email='existe@test.com', password='test123', name='existe')
+
+    def test_provision(self):
+        ''' crea las filas validas y reporta las demas por linea '''
+        result = UserProvisioner(batch_size=2, workers=2).run(read_rows(io.StringIO(CSV)))
+        self.assertEqual(result['rows'], 6)
+        self.assertEqual(result['created'], 2)
+        self.assertEqual([failure['line'] for failure in result['failed']], [4, 5, 6, 7])
+        self.assertEqual(list(result['failed'][1]['errors']), ['email'])
+        self.assertEqual(list(result['failed'][3]['errors']), ['password'])
+        self.assertNotIn('tokens', result)
+
+        user = get_user_model().objects.get(email='uno@test.com')
+        self.assertEqual(user.name, 'uno')
+        self.assertTrue(user.check_password('password1'))
+        self.assertFalse(get_user_model().objects.filter(name='repetido').exists())
+
+    def test_email_case(self):
+        ''' correos que solo difieren en mayusculas son repetidos '''
+        content = 'email,name,password\nEXISTE@test.com,existe,password1\nuno@test.com,uno,password1\nUno@Test.com,uno,password2\n'
+        result = UserProvisioner(workers=1).run(read_rows(io.StringIO(content)))
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([failure['line'] for failure in result['failed']], [2, 4])
+
+    def test_counter(self):
+        ''' bulk_create no envia signals, el contador se ajusta '''
+        before = Counter.objects.get(name='user').value
+        UserProvisioner(workers=1).run(read_rows(io.StringIO(CSV)))
+        self.assertEqual(Counter.objects.get(name='user').value, before + 2)
+
+    def test_tokens(self):
+        ''' un token por usuario creado '''
+        result = UserProvisioner(workers=1, tokens=True).run(read_rows(io.StringIO(CSV)))
+        self.assertEqual(len(result['tokens']), 2)
+        for item in result['tokens']:
+            self.assertEqual(Token.objects.get(key=item['token']).user.email, item['email'])
+
+    def test_missing_columns(self):
+        ''' sin columna password '''
+        with self.assertRaises(ValueError):
+            UserProvisioner(workers=1).run(read_rows(io.StringIO('email,name\nuno@test.com,uno\n')))
+
+    def test_command(self):
+        ''' manage.py bulk_create_users con archivo de tokens '''
+        with tempfile.TemporaryDirectory() as directory:
+            path, tokens = os.path.join(directory, 'users.csv'), os.path.join(directory, 'tokens.csv')
+            with open(path, 'w') as stream:
+                stream.write(CSV)
+            out, err = io.StringIO(), io.StringIO()
+            call_command('bulk_create_users', path, '--workers', '1', '--tokens', tokens, stdout=out, stderr=err)
+            with open(tokens) as stream:
+                rows = list(csv.DictReader(stream))
+        self.assertIn('6 rows, 2 created, 4 failed', out.getvalue())
+        self.assertIn('line 5 uno@test.com', err.getvalue())
+        self.assertEqual(sorted(row['email'] for row in rows), ['dos@test.com', 'uno@test.com'])
+
+    def test_command_missing_file(self):
+        with self.assertRaises(CommandError):
+            call_command('bulk_create_users', '/nonexistent/users.csv', stdout=io.StringIO())
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class BulkCreateApiTest(TestCase):
+    """ api de creacion masiva, solo administradores """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(email='admin@test.com', password='test123', name='admin')
+        self.user = get_user_model().objects.create_user(email='existe@test.com', password='test123', name='existe')
+
+    def upload(self, content=CSV, **data):
+        data['file'] = SimpleUploadedFile('users.csv', content.encode('utf-8'), content_type='text/csv')
+        return self.client.post(BULK_URL, data, format='multipart')
+
+    def test_not_admin(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.upload().status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_anonymous(self):
+        self.assertEqual(self.upload().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_create(self):
+        self.client.force_authenticate(self.admin)
+        response = self.upload(tokens='true', batch_size='3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(len(response.data['failed']), 4)
+        self.assertEqual(len(response.data['tokens']), 2)
+        self.assertIn('rows_per_second', response.data)
+
+    def test_shared_pool(self):
+        ''' las peticiones reutilizan el pool del proceso en lugar de crear uno '''
+        self.client.force_authenticate(self.admin)
+        pool = provisioning.get_pool()
+        with mock.patch.object(provisioning, 'ProcessPoolExecutor') as executor:
+            self.assertEqual(self.upload().status_code, status.HTTP_200_OK)
+            self.assertEqual(self.upload('email,name,password\nnuevo@test.com,nuevo,password1\n').data['created'], 1)
+        executor.assert_not_called()
+        self.assertIs(provisioning.get_pool(), pool)
+
+    def test_invalid(self):
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.post(BULK_URL, {}, format='multipart').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.upload(batch_size='x').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.upload('email,name\n').status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,10 +1,13 @@
 from rest_framework.test import APITestCase
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth.models import Group
+from core.models import Counter
 
 CREATE_USER_URL = reverse('user:user-list')
 TOKEN_URL = reverse('user:token')
@@ -45,6 +48,20 @@ class PublicUserTest(TestCase):
         response = self.client.post(CREATE_USER_URL, payload)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_duplicated_case(self):
+        """ el correo se compara sin distinguir mayusculas """
+        sample_user(email='test@test.com', password='password', name='test')
+        response = self.client.post(CREATE_USER_URL, {'email': 'Test@Test.com', 'name': 'test', 'password': 'password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)
+
+    def test_token_email_case(self):
+        """ login con el correo en otras mayusculas """
+        sample_user(email='Test@test.com', password='password', name='test')
+        response = self.client.post(TOKEN_URL, {'email': 'test@TEST.com', 'password': 'password'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('token', response.data)
+
     def test_create_user_shot_password(self):
         """ create user with short password """
         payload = {
@@ -101,6 +118,87 @@ class PublicUserTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['count'], count)
 
+    def test_count_users_one_query(self):
+        """ counter read without COUNT(*) """
+        sample_user(email='test@gmail.com', password='lol123lol')
+        sample_user(email='other@gmail.com', password='lol123lol')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(COUNT_USERS_URL)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'])
+
+    def test_count_users_after_delete(self):
+        """ counter follows deletes of one user and of querysets """
+        user = sample_user(email='test@gmail.com', password='lol123lol')
+        sample_user(email='one@gmail.com', password='lol123lol')
+        sample_user(email='two@gmail.com', password='lol123lol')
+        user.delete()
+        self.assertEqual(self.client.get(COUNT_USERS_URL).data['count'], 2)
+        get_user_model().objects.filter(email__in=['one@gmail.com', 'two@gmail.com']).delete()
+        self.assertEqual(self.client.get(COUNT_USERS_URL).data['count'], 0)
+
+    def test_count_users_created_by_api(self):
+        """ counter follows users created by the api """
+        self.client.post(CREATE_USER_URL, {'email': 'test@test.com', 'name': 'test', 'password': 'password'})
+        self.assertEqual(self.client.get(COUNT_USERS_URL).data['count'], 1)
+
+    def test_count_users_without_counter(self):
+        """ missing counter is recalculated once """
+        sample_user(email='test@gmail.com', password='lol123lol')
+        Counter.objects.all().delete()
+        self.assertEqual(self.client.get(COUNT_USERS_URL).data['count'], 1)
+        self.assertEqual(Counter.objects.get(name='user').value, 1)
+
+    def test_count_users_approximate(self):
+        """ approximate count falls back to the counter without estimate """
+        sample_user(email='test@gmail.com', password='lol123lol')
+        response = self.client.get(COUNT_USERS_URL, {'approximate': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        if connection.vendor != 'postgresql':
+            self.assertEqual(response.data['count'], 1)
+
+
+class ListUserTest(TestCase):
+    """ listado de usuarios paginado y filtrado """
+
+    def setUp(self):
+        self.client = APIClient()
+        for index in range(5):
+            sample_user(email='user%s@test.com' % index, password='password', name='user %s' % index)
+        get_user_model().objects.filter(email='user1@test.com').update(is_active=False)
+        get_user_model().objects.filter(email='user2@test.com').update(is_staff=True)
+
+    def test_list_paginated_by_created(self):
+        """ paginas por cursor en orden de creacion """
+        response = self.client.get(CREATE_USER_URL, {'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        emails = [user['email'] for user in response.data['results']]
+        self.assertEqual(emails, ['user0@test.com', 'user1@test.com', 'user2@test.com'])
+
+        response = self.client.get(response.data['next'])
+        emails = [user['email'] for user in response.data['results']]
+        self.assertEqual(emails, ['user3@test.com', 'user4@test.com'])
+        self.assertIsNone(response.data['next'])
+
+    def test_list_filters(self):
+        """ filtros is_active, is_staff y prefijo de email """
+        response = self.client.get(CREATE_USER_URL, {'is_active': 'false'})
+        self.assertEqual([user['email'] for user in response.data['results']], ['user1@test.com'])
+
+        response = self.client.get(CREATE_USER_URL, {'is_staff': 'true', 'is_active': 'true'})
+        self.assertEqual([user['email'] for user in response.data['results']], ['user2@test.com'])
+
+        response = self.client.get(CREATE_USER_URL, {'email': 'user3'})
+        self.assertEqual([user['email'] for user in response.data['results']], ['user3@test.com'])
+
+    @override_settings(USER_LIST_MAX_PAGE_SIZE=2)
+    def test_list_capped(self):
+        """ tope de resultados por pagina """
+        response = self.client.get(CREATE_USER_URL, {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
 
 class PrivateUserApi(TestCase):
     """ Clase para probar funcionalidades privadas api modelo user """
@@ -139,4 +237,18 @@ class PrivateUserApi(TestCase):
         self.user.refresh_from_db()
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(self.user.name, payload['name'])
-        self.assertTrue(self.user.check_password(payload['password']))
\ No newline at end of file
+        self.assertTrue(self.user.check_password(payload['password']))
+
+    def test_update_single_query(self):
+        ''' nombre y contraseña en un solo UPDATE, sin cambios no escribe '''
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(ME_URL, {'name': 'New Name', 'password': 'newpassword'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "core_user"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"email"', updates[0])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(ME_URL, {'name': 'New Name'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('UPDATE')])
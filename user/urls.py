@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ListUser, LoginUser, UserMe, count_user
+from rest_framework_simplejwt.views import TokenBlacklistView
+from .views import BulkCreateUsers, ListUser, LoginUser, JWTLoginUser, JWTRefreshUser, UserMe, count_user
 
 app_name = 'user'
 
@@ -9,8 +10,12 @@ router.register('users', ListUser)
 
 urlpatterns = [
     # path('list-user/', ListUser.as_view(), name='create'),
+    path('users/bulk/', BulkCreateUsers.as_view(), name='user-bulk'),
     path('', include(router.urls)),
     path('token/', LoginUser.as_view(), name='token'),
+    path('token/jwt/', JWTLoginUser.as_view(), name='jwt'),
+    path('token/jwt/refresh/', JWTRefreshUser.as_view(), name='jwt-refresh'),
+    path('token/jwt/revoke/', TokenBlacklistView.as_view(), name='jwt-revoke'),
     path('me/', UserMe.as_view(), name='me'),
     path('count/', count_user, name='count')
 ]
@@ -1,11 +1,22 @@
+import codecs
+from concurrent.futures.process import BrokenProcessPool
 from django.contrib.auth import get_user_model
-from rest_framework import permissions, authentication, mixins, generics
+from rest_framework import permissions, mixins, generics
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
-from user.serializer import UserSerializer, TokenSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from core.models import Counter
+from core.pagination import KeysetPagination
+from user.authentication import CachedTokenAuthentication, get_authentication_classes
+from user import provisioning
+from user.provisioning import UserProvisioner, read_rows
+from user.serializer import UserSerializer, TokenSerializer, JWTTokenSerializer, JWTRefreshSerializer
+from user.signals import USER_COUNTER
 
 
 class LoginUser(ObtainAuthToken):
@@ -14,25 +25,106 @@ class LoginUser(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
 
+class JWTLoginUser(TokenObtainPairView):
+    """ get access and refresh jwt """
+    serializer_class = JWTTokenSerializer
+
+
+class JWTRefreshUser(TokenRefreshView):
+    """ rotate the refresh jwt if the user is still active """
+    serializer_class = JWTRefreshSerializer
+
+
+class UserPagination(KeysetPagination):
+    """ cursor over (created, id), pages capped by USER_LIST_MAX_PAGE_SIZE """
+    orderings = {
+        'created': ('created', 'id'),
+    }
+    default_ordering = 'created'
+    page_size_setting = 'USER_LIST_PAGE_SIZE'
+    max_page_size_setting = 'USER_LIST_MAX_PAGE_SIZE'
+
+
 class ListUser(mixins.ListModelMixin, mixins.CreateModelMixin, GenericViewSet):
-    """ list users """
+    """ list users, ?is_active=, ?is_staff= and ?email= (prefix) filter the list """
     serializer_class = UserSerializer
     queryset = get_user_model().objects.all()
+    pagination_class = UserPagination
+    boolean_filters = ('is_active', 'is_staff')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        for name in self.boolean_filters:
+            value = params.get(name, '').lower()
+            if value in ('true', '1'):
+                queryset = queryset.filter(**{name: True})
+            elif value in ('false', '0'):
+                queryset = queryset.filter(**{name: False})
+        if params.get('email'):
+            queryset = queryset.filter(email__startswith=params['email'])
+        return queryset
 
 
 class UserMe(generics.RetrieveUpdateDestroyAPIView):
     """ get user authenticated """
     serializer_class = UserSerializer
     queryset = get_user_model().objects.all()
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user puede venir del cache de autenticacion con valores viejos,
+        # las escrituras comparan los campos modificados contra la fila actual
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+
+class BulkCreateUsers(APIView):
+    """
+    admin only, multipart upload of a csv (file) with email,name,password,
+    tokens=true issues auth tokens, responds with throughput and failed rows
+    """
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+
+    def get_authenticators(self):
+        return [auth() for auth in get_authentication_classes()]
+
+    def post(self, request, format=None):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': ['This field is required.']})
+        try:
+            batch_size = int(request.data.get('batch_size', 1000))
+        except ValueError:
+            batch_size = 0
+        if batch_size <= 0:
+            raise ValidationError({'batch_size': ['A positive integer is required.']})
+
+        provisioner = UserProvisioner(
+            batch_size, provisioning.get_api_workers(), tokens=request.data.get('tokens') in ('true', '1'),
+            pool=provisioning.get_pool(),
+        )
+        try:
+            result = provisioner.run(read_rows(codecs.iterdecode(upload, 'utf-8')))
+        except ValueError as exc:
+            raise ValidationError({'file': [str(exc)]})
+        except BrokenProcessPool:
+            provisioning.discard_pool()
+            raise
+        return Response(result)
 
 
 @api_view(['GET'])
 def count_user(request, format=None):
-    """ obtiene  """
-    count = get_user_model().objects.all().count()
+    """
+    obtiene la cantidad de usuarios del contador mantenido por user.signals,
+    con ?approximate=true usa la estimacion del planificador si existe
+    """
+    count = None
+    if request.query_params.get('approximate') == 'true':
+        count = Counter.objects.estimate(get_user_model())
+    if count is None:
+        count = Counter.objects.get_value(USER_COUNTER, get_user_model().objects.all())
     return Response({'count': count})